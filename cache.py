@@ -0,0 +1,293 @@
+"""Reusable cache engines (in-memory LRU, SQLite-backed disk cache, single-flight)"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class LRUCache:
+    """Size- and TTL-bounded LRU cache with O(1) get/set/evict
+
+    Entries are kept in an OrderedDict ordered by recency of use. Expiry is
+    lazy: a stale entry is dropped when it is read, or when it reaches the
+    cold end of the ordering during a write, so no operation ever scans the
+    whole cache and nothing forces a garbage collection.
+    """
+    def __init__(self, max_size: int = 1000, ttl_seconds: Optional[float] = None):
+        self._data = OrderedDict()  # key -> (expires_at, value)
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Get a live entry and mark it as recently used"""
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None):
+        """Store an entry, evicting the least recently used ones when full"""
+        now = time.monotonic()
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        expires_at = now + ttl if ttl else None
+
+        if key in self._data:
+            self._data.move_to_end(key)
+        self._data[key] = (expires_at, value)
+
+        self._drop_cold_expired(now)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def _drop_cold_expired(self, now: float):
+        """Drop expired entries at the cold end (amortized O(1): each entry is dropped once)"""
+        while self._data:
+            expires_at, _ = next(iter(self._data.values()))
+            if expires_at is None or expires_at > now:
+                break
+            self._data.popitem(last=False)
+            self.expirations += 1
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry without counting a hit or miss"""
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def clear(self):
+        """Remove every entry (counters are kept)"""
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        entry = self._data.get(key)
+        return entry is not None and (entry[0] is None or entry[0] > time.monotonic())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def hit_ratio(self) -> float:
+        """Fraction of lookups that were served from the cache"""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of size and hit/miss/eviction counters"""
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": round(self.hit_ratio, 4),
+        }
+
+
+class DiskCache:
+    """SQLite-backed key/value cache that survives restarts
+
+    Values must be JSON-serializable. Every SQLite call runs on a dedicated
+    single-thread executor, so the event loop never touches the disk. The
+    database is opened in the background by start(); until it is ready,
+    lookups are misses and writes are dropped instead of blocking startup.
+    Size and TTL are enforced in bulk every few hundred writes.
+    """
+    PRUNE_EVERY = 200
+
+    def __init__(self, path: str, max_entries: int = 50000, ttl_seconds: float = 6 * 3600):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="disk-cache")
+        self._conn = None
+        self._started = False
+        self._ready = False
+        self._writes_since_prune = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+        self.errors = 0
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    def start(self):
+        """Open the database in the background (safe to call more than once)"""
+        if self._started:
+            return
+        self._started = True
+        self._executor.submit(self._open)
+
+    def _open(self):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS cache_expires_at ON cache (expires_at)")
+            conn.commit()
+            self._conn = conn
+            self._prune()
+            count = conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+            self._ready = True
+            print(f"✅ Disk cache ready: {count} entries ({os.path.basename(self.path)})")
+        except Exception as e:
+            self.errors += 1
+            print(f"❌ Disk cache unavailable: {e}")
+
+    async def get(self, key: str) -> Any:
+        """Get a live entry, or None (also None while the database is still opening)"""
+        if not self._ready:
+            self.misses += 1
+            return None
+
+        loop = asyncio.get_running_loop()
+        value = await loop.run_in_executor(self._executor, self._get, key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def _get(self, key: str) -> Any:
+        try:
+            row = self._conn.execute(
+                "SELECT value FROM cache WHERE key = ? AND expires_at > ?", (key, time.time())
+            ).fetchone()
+            return json.loads(row[0]) if row else None
+        except Exception as e:
+            self.errors += 1
+            print(f"[DISK-CACHE] Read failed: {e}")
+            return None
+
+    def set(self, key: str, value: Any):
+        """Queue a write without waiting for it"""
+        if not self._ready:
+            return
+        self._executor.submit(self._set, key, json.dumps(value))
+
+    def _set(self, key: str, payload: str):
+        try:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache (key, value, expires_at) VALUES (?, ?, ?)",
+                (key, payload, time.time() + self.ttl_seconds)
+            )
+            self._conn.commit()
+            self.writes += 1
+
+            self._writes_since_prune += 1
+            if self._writes_since_prune >= self.PRUNE_EVERY:
+                self._prune()
+        except Exception as e:
+            self.errors += 1
+            print(f"[DISK-CACHE] Write failed: {e}")
+
+    def _prune(self):
+        """Drop expired rows, then the soonest-expiring rows beyond max_entries"""
+        self._writes_since_prune = 0
+        self._conn.execute("DELETE FROM cache WHERE expires_at <= ?", (time.time(),))
+        count = self._conn.execute("SELECT COUNT(*) FROM cache").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY expires_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+        self._conn.commit()
+
+    def close(self):
+        """Flush queued writes and close the database"""
+        def _close():
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        self._ready = False
+        self._executor.submit(_close)
+        self._executor.shutdown(wait=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of hit/miss/write counters"""
+        lookups = self.hits + self.misses
+        return {
+            "ready": self._ready,
+            "hits": self.hits,
+            "misses": self.misses,
+            "writes": self.writes,
+            "errors": self.errors,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """Deduplicates concurrent async calls that share a key
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is in flight await the same task. Every caller gets the same
+    result or exception. A cancelled caller only stops waiting - the shared
+    work is cancelled once no callers are left waiting on it.
+    """
+    def __init__(self):
+        self._calls = {}  # key -> [task, waiter_count]
+        self.started = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        """Run work() for key, or join the call already in flight"""
+        call = self._calls.get(key)
+        if call is None:
+            task = asyncio.ensure_future(work())
+            call = [task, 0]
+            self._calls[key] = call
+            task.add_done_callback(lambda _task: self._finish(key, call))
+            self.started += 1
+        else:
+            self.shared += 1
+
+        call[1] += 1
+        try:
+            return await asyncio.shield(call[0])
+        finally:
+            call[1] -= 1
+            if call[1] == 0 and not call[0].done():
+                call[0].cancel()
+
+    def _finish(self, key: Hashable, call: list):
+        if self._calls.get(key) is call:
+            del self._calls[key]
+        # Mark the exception as retrieved when every waiter was cancelled first
+        if not call[0].cancelled():
+            call[0].exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of in-flight and deduplicated call counters"""
+        return {"in_flight": len(self._calls), "started": self.started, "shared": self.shared}
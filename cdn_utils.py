@@ -0,0 +1,89 @@
+"""Discord CDN URL utility functions"""
+from typing import Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+DISCORD_CDN_HOSTS = {"cdn.discordapp.com", "media.discordapp.net"}
+ATTACHMENT_PATH_PREFIXES = ("attachments", "ephemeral-attachments")
+
+
+def is_discord_cdn_url(url: str) -> bool:
+    """Check if a URL is served by the Discord CDN or media proxy"""
+    try:
+        return (urlsplit(url).hostname or "") in DISCORD_CDN_HOSTS
+    except ValueError:
+        return False
+
+
+def parse_discord_attachment(url: str) -> Optional[Tuple[str, str, str]]:
+    """Get (channel_id, attachment_id, filename) from a Discord attachment URL"""
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+
+    if (parts.hostname or "") not in DISCORD_CDN_HOSTS:
+        return None
+
+    segments = parts.path.strip("/").split("/")
+    if len(segments) != 4 or segments[0] not in ATTACHMENT_PATH_PREFIXES:
+        return None
+
+    _, channel_id, attachment_id, filename = segments
+    if not channel_id.isdigit() or not attachment_id.isdigit() or not filename:
+        return None
+    return channel_id, attachment_id, filename
+
+
+def canonicalize_image_url(url: str) -> str:
+    """
+    Get a stable identity for an image URL
+
+    Discord CDN and media proxy URLs carry rotating signature parameters
+    (ex, is, hm) and size parameters, so the same attachment shows up under
+    many URLs. Attachments are keyed on their channel/attachment/filename
+    path; other Discord CDN paths drop their query string. Non-Discord URLs
+    are returned unchanged apart from the fragment.
+    """
+    url = url.strip()
+    attachment = parse_discord_attachment(url)
+    if attachment:
+        return "discord-attachment/" + "/".join(attachment)
+
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+
+    host = parts.hostname or ""
+    if host in DISCORD_CDN_HOSTS:
+        return f"discord-cdn{parts.path}"
+
+    return url.split("#", 1)[0]
+
+
+MEDIA_PROXY_HOST = "media.discordapp.net"
+MEDIA_PROXY_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp")
+MEDIA_PROXY_SIZE_PARAMS = ("width", "height", "format", "quality")
+
+
+def media_proxy_url(url: str, width: int, height: int, image_format: Optional[str] = None) -> Optional[str]:
+    """
+    Get a media proxy URL for a downscaled rendition of a Discord attachment
+
+    How the proxy fills the width x height box (fit vs stretch, upscaling)
+    is not documented - `python model_tools.py benchmark-preprocess --urls`
+    reports the rendition sizes it actually returns. Signature parameters
+    are kept, since the proxy checks them too. Returns None for URLs that
+    can't be rewritten (non-attachments, animated GIFs, unknown formats).
+    """
+    attachment = parse_discord_attachment(url)
+    if not attachment or not attachment[2].lower().endswith(MEDIA_PROXY_EXTENSIONS):
+        return None
+
+    parts = urlsplit(url.strip())
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+             if key not in MEDIA_PROXY_SIZE_PARAMS]
+    query += [("width", str(width)), ("height", str(height))]
+    if image_format:
+        query.append(("format", image_format))
+    return urlunsplit(("https", MEDIA_PROXY_HOST, parts.path, urlencode(query), ""))
@@ -1,16 +1,18 @@
 """Pokemon prediction and auto-detection"""
 import discord
 import asyncio
+import time
 from discord.ext import commands
 from utils import (
-    format_pokemon_prediction,
+    LabelInfo,
+    format_confidence,
+    format_label_prediction,
     get_image_url_from_message,
     normalize_pokemon_name,
-    get_pokemon_with_variants,
-    is_rare_pokemon,
-    load_pokemon_data
+    get_pokemon_with_variants
 )
-from config import POKETWO_USER_ID, PREDICTION_CONFIDENCE
+from config import POKETWO_USER_ID, PREDICTION_CONFIDENCE, PREDICTION_SPAWN_DEADLINE
+from predict import DeadlineExceeded, ModelsNotReady
 
 # Hardcoded channel ID where any image will be auto-predicted
 AUTO_PREDICT_CHANNEL_ID = 1453015934393651272  # Set to your channel ID (e.g., 1234567890)
@@ -20,7 +22,6 @@ class Prediction(commands.Cog):
 
     def __init__(self, bot):
         self.bot = bot
-        self.pokemon_data = load_pokemon_data()
         print(f"[AUTO-PREDICT] Channel ID set to: {AUTO_PREDICT_CHANNEL_ID}")
 
     @property
@@ -68,33 +69,22 @@ class Prediction(commands.Cog):
 
         return None
 
-    async def get_pokemon_ping_info(self, pokemon_name: str, guild_id: int) -> str:
-        """Get ping information for a Pokemon based on its rarity"""
-        pokemon_data = load_pokemon_data()
-        from utils import find_pokemon_by_name
-        pokemon = find_pokemon_by_name(pokemon_name, pokemon_data)
-
-        if not pokemon:
+    async def get_pokemon_ping_info(self, label: LabelInfo, guild_id: int) -> str:
+        """Get ping information for a Pokemon based on its precompiled rarity flags"""
+        if not label.pokemon:
             return None
 
         settings = await self.db.get_guild_settings(guild_id)
         pings = []
 
-        # Get rarity - handle both string and list
-        rarity_value = pokemon.get('rarity', '')
-        rarities = rarity_value if isinstance(rarity_value, list) else [rarity_value]
-
-        # Normalize to lowercase
-        rarities = [r.lower() for r in rarities if r]
-
         # Check for rare ping (Legendary, Mythical, Ultra Beast)
-        if any(r in ['legendary', 'mythical', 'ultra beast'] for r in rarities):
+        if label.is_rare:
             rare_role_id = settings.get('rare_role_id')
             if rare_role_id:
                 pings.append(f"Rare Ping: <@&{rare_role_id}>")
 
         # Check for regional ping
-        if 'regional' in rarities:
+        if label.is_regional:
             regional_role_id = settings.get('regional_role_id')
             if regional_role_id:
                 pings.append(f"Regional Ping: <@&{regional_role_id}>")
@@ -127,16 +117,12 @@ class Prediction(commands.Cog):
 
         return formatted_hunters
 
-    async def get_collectors_for_spawn(self, pokemon_name: str, guild_id: int) -> list:
+    async def get_collectors_for_spawn(self, pokemon_name: str, guild_id: int, label: LabelInfo) -> list:
         """Get all collectors for a Pokemon spawn
 
         Only checks for collectors who have collected THIS EXACT Pokemon.
         The database method handles matching against their collection.
         """
-        pokemon = None
-        from utils import find_pokemon_by_name
-        pokemon = find_pokemon_by_name(pokemon_name, self.pokemon_data)
-
         # Only search for the exact Pokemon that spawned
         search_names = [pokemon_name]
 
@@ -147,7 +133,7 @@ class Prediction(commands.Cog):
         collectors = await self.db.get_collectors_for_pokemon(guild_id, search_names, afk_users)
 
         # If rare Pokemon, add rare collectors
-        if pokemon and is_rare_pokemon(pokemon):
+        if label.is_rare:
             rare_collectors = await self.db.get_rare_collectors(guild_id, afk_users)
             collectors = list(set(collectors + rare_collectors))
 
@@ -163,20 +149,22 @@ class Prediction(commands.Cog):
 
         try:
             # Use async prediction
-            name, confidence = await self.predictor.predict(image_url, self.http_session)
+            result = await self.predictor.predict(image_url, self.http_session)
             # ADD THIS: Increment prediction counter
-            if hasattr(self.bot, 'prediction_count'):
+            if hasattr(self.bot, 'prediction_count') and not result.cached:
                 self.bot.prediction_count += 1
 
-            if not name or not confidence:
+            if not result.name:
                 return "Could not predict Pokemon from the provided image."
 
-            formatted_output = format_pokemon_prediction(name, confidence)
+            name = result.name
+            label = self.predictor.label_for(result)
+            formatted_output = format_label_prediction(label, format_confidence(result.probability))
 
             # Get ping information concurrently
             hunters_task = self.get_shiny_hunters_for_spawn(name, guild_id)
-            collectors_task = self.get_collectors_for_spawn(name, guild_id)
-            ping_info_task = self.get_pokemon_ping_info(name, guild_id)
+            collectors_task = self.get_collectors_for_spawn(name, guild_id, label)
+            ping_info_task = self.get_pokemon_ping_info(label, guild_id)
 
             hunters, collectors, ping_info = await asyncio.gather(
                 hunters_task, collectors_task, ping_info_task,
@@ -196,6 +184,8 @@ class Prediction(commands.Cog):
 
             return formatted_output
 
+        except ModelsNotReady:
+            return "Prediction models are still loading, please try again in a minute."
         except ValueError as e:
             error_msg = str(e)
             if "404" in error_msg or "Failed to load image" in error_msg:
@@ -332,28 +322,25 @@ class Prediction(commands.Cog):
             if image_url:
                 try:
                     # Get prediction with model tracking
-                    cache_key = self.predictor._generate_cache_key(image_url)
-                    cached_result = self.predictor.cache.get(cache_key)
-
-                    if cached_result:
-                        name, confidence, model_used = cached_result
-                    else:
-                        name, confidence = await self.predictor.predict(image_url, self.http_session)
+                    result = await self.predictor.predict(
+                        image_url, self.http_session, deadline=time.monotonic() + PREDICTION_SPAWN_DEADLINE
+                    )
+                    if hasattr(self.bot, 'prediction_count') and not result.cached:
+                        self.bot.prediction_count += 1
 
-                        if hasattr(self.bot, 'prediction_count'):
-                            self.bot.prediction_count += 1
-                        # Get the model used from the last prediction
-                        cached_result = self.predictor.cache.get(cache_key)
-                        model_used = cached_result[2] if cached_result else "unknown"
+                    name = result.name
+                    label = self.predictor.label_for(result)
+                    confidence = format_confidence(result.probability)
+                    model_used = result.model_used
 
-                    if name and confidence:
-                        formatted_output = format_pokemon_prediction(name, confidence)
+                    if name:
+                        formatted_output = format_label_prediction(label, confidence)
 
                         # Get all ping information concurrently
                         tasks = [
                             self.get_shiny_hunters_for_spawn(name, message.guild.id),
-                            self.get_collectors_for_spawn(name, message.guild.id),
-                            self.get_pokemon_ping_info(name, message.guild.id)
+                            self.get_collectors_for_spawn(name, message.guild.id, label),
+                            self.get_pokemon_ping_info(label, message.guild.id)
                         ]
 
                         results = await asyncio.gather(*tasks, return_exceptions=True)
@@ -376,6 +363,12 @@ class Prediction(commands.Cog):
                         # Log to secondary model channel if secondary model was used
                         await self.log_secondary_model_prediction(name, confidence, model_used, message, image_url)
 
+                except ModelsNotReady as e:
+                    print(f"[AUTO-PREDICT] Deferred, {e}: {image_url[:100]}")
+
+                except DeadlineExceeded as e:
+                    print(f"[AUTO-PREDICT] Deadline missed, {e}: {image_url[:100]}")
+
                 except ValueError as e:
                     # Handle image loading errors (404, expired URLs, etc.)
                     error_msg = str(e)
@@ -405,93 +398,92 @@ class Prediction(commands.Cog):
 
                         if image_url:
                             try:
-                                # Get prediction with model tracking
-                                cache_key = self.predictor._generate_cache_key(image_url)
-                                cached_result = self.predictor.cache.get(cache_key)
-
-                                if cached_result:
-                                    name, confidence, model_used = cached_result
-                                else:
-                                    name, confidence = await self.predictor.predict(image_url, self.http_session)
-                                    if hasattr(self.bot, 'prediction_count'):
-                                        self.bot.prediction_count += 1
-                                    # Get the model used from the last prediction
-                                    cached_result = self.predictor.cache.get(cache_key)
-                                    model_used = cached_result[2] if cached_result else "unknown"
-
-                                if name and confidence:
-                                    # Parse confidence
-                                    confidence_str = str(confidence).rstrip('%')
-                                    try:
-                                        confidence_value = float(confidence_str)
-
-                                        # Get all ping information concurrently
-                                        tasks = [
-                                            self.get_shiny_hunters_for_spawn(name, message.guild.id),
-                                            self.get_collectors_for_spawn(name, message.guild.id),
-                                            self.get_pokemon_ping_info(name, message.guild.id)
-                                        ]
-
-                                        results = await asyncio.gather(*tasks, return_exceptions=True)
-                                        hunters, collectors, ping_info = results
-
-                                        # Check if should send based on only-pings setting
-                                        should_send = await self.should_send_prediction(
-                                            name, message.guild.id, hunters, collectors, ping_info
-                                        )
-
-                                        if should_send:
-                                            # Format and send prediction in spawn channel
-                                            formatted_output = format_pokemon_prediction(name, confidence)
-
-                                            # Handle results safely
-                                            if isinstance(hunters, list) and hunters:
-                                                formatted_output += f"\nShiny Hunters: {' '.join(hunters)}"
-
-                                            if isinstance(collectors, list) and collectors:
-                                                collector_mentions = " ".join([f"<@{user_id}>" for user_id in collectors])
-                                                formatted_output += f"\nCollectors: {collector_mentions}"
-
-                                            if isinstance(ping_info, str) and ping_info:
-                                                formatted_output += f"\n{ping_info}"
-
-                                            # Send prediction in spawn channel
-                                            await message.channel.send(formatted_output, reference=message, mention_author=False)
-
-                                        # If low confidence, ALSO send to low prediction channel
-                                        if confidence_value < PREDICTION_CONFIDENCE:
-                                            low_channel_id = await self.db.get_low_prediction_channel()
-
-                                            if low_channel_id:
-                                                low_channel = self.bot.get_channel(low_channel_id)
-
-                                                if low_channel:
-                                                    embed = discord.Embed(
-                                                        title="Low Confidence Prediction",
-                                                        description=f"**Pokemon:** {name}\n**Confidence:** {confidence}\n**Server:** {message.guild.name}\n**Channel:** {message.channel.mention}",
-                                                        color=0xff9900
-                                                    )
-
-                                                    if image_url:
-                                                        embed.set_thumbnail(url=image_url)
-
-                                                    # Add jump button
-                                                    view = discord.ui.View()
-                                                    jump_button = discord.ui.Button(
-                                                        label="Jump to Message",
-                                                        url=message.jump_url,
-                                                        emoji="🔗",
-                                                        style=discord.ButtonStyle.link
-                                                    )
-                                                    view.add_item(jump_button)
-
-                                                    await low_channel.send(embed=embed, view=view)
-
-                                        # Log to secondary model channel if secondary model was used
-                                        await self.log_secondary_model_prediction(name, confidence, model_used, message, image_url)
-
-                                    except ValueError:
-                                        print(f"Could not parse confidence value: {confidence}")
+                                # Spawns only matter until someone catches them
+                                result = await self.predictor.predict(
+                                    image_url, self.http_session,
+                                    deadline=time.monotonic() + PREDICTION_SPAWN_DEADLINE
+                                )
+                                if hasattr(self.bot, 'prediction_count') and not result.cached:
+                                    self.bot.prediction_count += 1
+
+                                name = result.name
+                                label = self.predictor.label_for(result)
+                                confidence = format_confidence(result.probability)
+                                model_used = result.model_used
+
+                                if name:
+                                    confidence_value = result.confidence_pct
+
+                                    # Get all ping information concurrently
+                                    tasks = [
+                                        self.get_shiny_hunters_for_spawn(name, message.guild.id),
+                                        self.get_collectors_for_spawn(name, message.guild.id, label),
+                                        self.get_pokemon_ping_info(label, message.guild.id)
+                                    ]
+
+                                    results = await asyncio.gather(*tasks, return_exceptions=True)
+                                    hunters, collectors, ping_info = results
+
+                                    # Check if should send based on only-pings setting
+                                    should_send = await self.should_send_prediction(
+                                        name, message.guild.id, hunters, collectors, ping_info
+                                    )
+
+                                    if should_send:
+                                        # Format and send prediction in spawn channel
+                                        formatted_output = format_label_prediction(label, confidence)
+
+                                        # Handle results safely
+                                        if isinstance(hunters, list) and hunters:
+                                            formatted_output += f"\nShiny Hunters: {' '.join(hunters)}"
+
+                                        if isinstance(collectors, list) and collectors:
+                                            collector_mentions = " ".join([f"<@{user_id}>" for user_id in collectors])
+                                            formatted_output += f"\nCollectors: {collector_mentions}"
+
+                                        if isinstance(ping_info, str) and ping_info:
+                                            formatted_output += f"\n{ping_info}"
+
+                                        # Send prediction in spawn channel
+                                        await message.channel.send(formatted_output, reference=message, mention_author=False)
+
+                                    # If low confidence, ALSO send to low prediction channel
+                                    if confidence_value < PREDICTION_CONFIDENCE:
+                                        low_channel_id = await self.db.get_low_prediction_channel()
+
+                                        if low_channel_id:
+                                            low_channel = self.bot.get_channel(low_channel_id)
+
+                                            if low_channel:
+                                                embed = discord.Embed(
+                                                    title="Low Confidence Prediction",
+                                                    description=f"**Pokemon:** {name}\n**Confidence:** {confidence}\n**Server:** {message.guild.name}\n**Channel:** {message.channel.mention}",
+                                                    color=0xff9900
+                                                )
+
+                                                if image_url:
+                                                    embed.set_thumbnail(url=image_url)
+
+                                                # Add jump button
+                                                view = discord.ui.View()
+                                                jump_button = discord.ui.Button(
+                                                    label="Jump to Message",
+                                                    url=message.jump_url,
+                                                    emoji="🔗",
+                                                    style=discord.ButtonStyle.link
+                                                )
+                                                view.add_item(jump_button)
+
+                                                await low_channel.send(embed=embed, view=view)
+
+                                    # Log to secondary model channel if secondary model was used
+                                    await self.log_secondary_model_prediction(name, confidence, model_used, message, image_url)
+
+                            except ModelsNotReady as e:
+                                print(f"[POKETWO-SPAWN] Deferred, {e}: {image_url[:100]}")
+
+                            except DeadlineExceeded as e:
+                                print(f"[POKETWO-SPAWN] Deadline missed, {e}: {image_url[:100]}")
 
                             except ValueError as e:
                                 # Handle image loading errors (404, expired URLs, etc.)
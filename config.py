@@ -48,3 +48,43 @@ STARBOARD_DATA_PATH = "data/starboard.txt"
 
 # Model Configuration (for predict.py)
 MODEL_CACHE_DIR = "model_cache"
+MODEL_REPO_BASE = os.getenv("MODEL_REPO_BASE", "https://raw.githubusercontent.com/teamrocket43434/jessmodel/main")
+MODEL_DOWNLOAD_PARALLEL_MIN_MB = 32  # Files at least this large are fetched as parallel byte ranges
+MODEL_DOWNLOAD_PARALLEL_CHUNKS = 4   # Concurrent ranges per large file
+MODEL_GRAPH_OPTIMIZATION = "extended"  # "basic" (optimize at every start), "extended" or "all" (cached under model_cache/optimized)
+PREDICTION_QUANTIZED_MODE = None  # None (FP32), "dynamic" or "static" INT8 - check `python model_tools.py evaluate-quantized` first
+PREDICTION_UINT8_INPUT = True  # Feed models raw uint8 NHWC pixels, normalization runs inside the graph (model_cache/uint8)
+PREDICTION_DRAFT_DECODE = False  # Decode JPEGs at 1/2-1/8 scale, just above the largest model input - check `python model_tools.py benchmark-preprocess` first
+PREDICTION_RESAMPLE = {"primary": "lanczos", "secondary": "lanczos"}  # Resize filter per model: nearest, box, bilinear, hamming, bicubic, lanczos
+PREDICTION_RESIZE_REDUCING_GAP = None  # e.g. 2.0: cheap integer-factor reduce() before the filter on large images (None = off)
+PREDICTION_BATCH_WINDOW_MS = 10  # How long concurrent spawns are collected into one batch
+PREDICTION_MAX_BATCH_SIZE = 8    # Flush a batch early once this many images are queued
+PREDICTION_WORKERS = 2           # Threads for image decoding and ONNX inference (off the event loop)
+PREDICTION_CACHE_SIZE = 5000     # Cached prediction results (O(1) LRU, cheap to keep large)
+PREDICTION_CACHE_TTL = 900       # seconds
+PREDICTION_CONTENT_CACHE = True  # Second cache tier keyed by a hash of the image bytes
+PREDICTION_DISK_CACHE = True     # SQLite tier under model_cache/ that survives restarts
+PREDICTION_DISK_CACHE_SIZE = 50000
+PREDICTION_DISK_CACHE_TTL = 21600  # 6 hours
+PREDICTION_NEGATIVE_CACHE_SIZE = 2000  # Dead/unsupported image URLs remembered (skips their retry chain)
+PREDICTION_NEGATIVE_CACHE_TTL = 600     # seconds
+PREDICTION_TOP_K = 3             # Alternatives kept on each PredictionResult
+PREDICTION_WARMUP = True           # Run synthetic batches of every size and pre-open CDN connections at load
+PREDICTION_WARMUP_CDN_CONNECTIONS = 2  # Keep-alive connections pre-opened per Discord CDN host
+CDN_RATE_LIMIT_INITIAL = 10.0   # Requests/s per Discord CDN host to start with (adapts to 429s and Retry-After)
+CDN_RATE_LIMIT_MIN = 1.0        # Floor the rate is halved down to on repeated 429s
+CDN_RATE_LIMIT_MAX = 50.0       # Ceiling the rate grows towards while requests succeed
+CDN_RATE_LIMIT_BURST = 10       # Requests a host can take at once after being idle
+CDN_RATE_LIMIT_INCREASE = 0.2   # Requests/s added after each accepted request
+PREDICTION_MEDIA_PROXY = False       # Fetch attachments as downscaled renditions from media.discordapp.net (falls back to the original) - check `python model_tools.py benchmark-preprocess --urls` first
+PREDICTION_MEDIA_PROXY_OVERSAMPLE = 1.5  # Rendition box vs the largest model input
+PREDICTION_MEDIA_PROXY_FORMAT = None     # None keeps the source format, or "webp"/"png"
+PREDICTION_HEDGED_FETCH = False     # Send a second image request when the first is slow to return headers (first wins)
+PREDICTION_HEDGE_PERCENTILE = 95    # Hedge once a request is slower than this percentile of the host's recent ones
+PREDICTION_HEDGE_BUDGET = 0.05      # Hedges never exceed this share of image requests
+PREDICTION_HEDGE_DEFAULT_DELAY = 1.0  # Hedge delay (seconds) until a host has enough latency samples
+PREDICTION_SPAWN_DEADLINE = 8.0   # Seconds a spawn prediction is worth waiting for (retries/secondary fit inside it)
+PREDICTION_PRE_READY_BACKLOG = 50  # Spawns allowed to wait while models load at startup (more are deferred)
+PREDICTION_PRE_READY_WAIT = 180    # Longest a pre-ready spawn waits for the models, in seconds
+PREDICTION_LOW_MEMORY_MODE = False   # Load the secondary model on first fallback, unload it when idle
+SECONDARY_IDLE_UNLOAD_SECONDS = 600  # Idle time before the secondary model is unloaded (low-memory mode)
@@ -0,0 +1,69 @@
+"""Hedged-request policy (per-host latency percentiles and a hedge budget)"""
+from collections import deque
+from typing import Dict
+
+MIN_SAMPLES = 20      # Time-to-headers samples a host needs before its percentile is trusted
+SAMPLE_WINDOW = 200   # Recent samples kept per host
+MIN_DELAY = 0.05      # Never hedge sooner than this, in seconds
+MAX_CREDIT = 5.0      # Unused hedge budget that can pile up (bounds bursts after a quiet spell)
+
+
+class HedgePolicy:
+    """Decides when a slow request gets a second, hedged copy
+
+    The hedge delay is a percentile of each host's recent time-to-headers,
+    so only the slow tail is duplicated. Every request earns `budget`
+    credit and a hedge spends one, so hedges can never exceed that share of
+    requests however slow the host gets.
+    """
+    def __init__(self, percentile: float = 95, budget: float = 0.05, default_delay: float = 1.0):
+        self.percentile = percentile
+        self.budget = budget
+        self.default_delay = default_delay
+        self._samples: Dict[str, deque] = {}
+        self._delays: Dict[str, float] = {}
+        self._credit = 0.0
+
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+
+    def delay(self, host: str) -> float:
+        """Seconds to wait for headers before hedging a request to this host"""
+        return self._delays.get(host, self.default_delay)
+
+    def record_request(self):
+        """Count one outgoing request and earn its share of hedge budget"""
+        self.requests += 1
+        self._credit = min(MAX_CREDIT, self._credit + self.budget)
+
+    def record_latency(self, host: str, seconds: float):
+        """Record a time-to-headers sample (a lower bound when the request was cut short)"""
+        samples = self._samples.get(host)
+        if samples is None:
+            samples = self._samples[host] = deque(maxlen=SAMPLE_WINDOW)
+        samples.append(seconds)
+        if len(samples) >= MIN_SAMPLES:
+            ordered = sorted(samples)
+            index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+            self._delays[host] = max(MIN_DELAY, ordered[index])
+
+    def try_hedge(self) -> bool:
+        """Spend budget on a hedge, or refuse if the hedge share is used up"""
+        if self._credit < 1:
+            self.denied += 1
+            return False
+        self._credit -= 1
+        self.hedges += 1
+        return True
+
+    def stats(self) -> dict:
+        return {
+            "requests": self.requests,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "denied": self.denied,
+            "hedge_rate": round(self.hedges / self.requests, 4) if self.requests else 0.0,
+            "delay_ms": {host: round(delay * 1000, 1) for host, delay in sorted(self._delays.items())},
+        }
@@ -1,5 +1,6 @@
 """Main bot file"""
 import os
+import time
 import discord
 import asyncio
 import aiohttp
@@ -36,27 +37,56 @@ bot = commands.Bot(
 bot.db = None
 bot.predictor = None
 bot.http_session = None
+bot.model_loader = None
+bot.background_tasks = []
+bot.ready_count = 0
+bot.startup_started = time.perf_counter()
 
 # ADD THIS: Memory tracking
 bot.process = psutil.Process(os.getpid())
 bot.prediction_count = 0
 
 async def initialize_predictor():
-    """Initialize the predictor with dual model system"""
+    """Initialize the predictor with dual model system (keeps an existing one and its warm caches)"""
+    if bot.predictor is not None:
+        return
     try:
         bot.predictor = Prediction()
         print("✅ Predictor initialized (dual model system)")
     except Exception as e:
         print(f"❌ Failed to initialize predictor: {e}")
 
+def log_startup_stage(stage: str, started: float):
+    """Log how long a startup stage took"""
+    print(f"[STARTUP] {stage}: {time.perf_counter() - started:.2f}s")
+
+async def load_models_in_background():
+    """Download and initialize prediction models without holding up the rest of startup"""
+    started = time.perf_counter()
+    try:
+        print("Downloading and initializing prediction models in the background...")
+        await bot.predictor.initialize_models(bot.http_session)
+        print("✅ Dual model system ready!")
+        log_startup_stage("Models (background)", started)
+
+        # Log memory after model loading
+        post_model_mem = bot.process.memory_info().rss / 1024 / 1024
+        print(f"[MEMORY] After models loaded: {post_model_mem:.1f} MB")
+    except Exception as e:
+        print(f"❌ Failed to initialize models: {e} (spawns will retry loading)")
+
 async def initialize_database():
     """Initialize MongoDB connection"""
+    if bot.db is not None:
+        return True
     bot.db = Database()
     success = await bot.db.connect()
     return success
 
 async def initialize_http_session():
-    """Initialize aiohttp session"""
+    """Initialize aiohttp session (reused for the whole process - never re-created)"""
+    if bot.http_session is not None and not bot.http_session.closed:
+        return
     timeout = aiohttp.ClientTimeout(total=10, connect=3)
     connector = aiohttp.TCPConnector(
         limit=50,
@@ -94,7 +124,33 @@ async def memory_monitor():
             mem_mb = mem_info.rss / 1024 / 1024
             
             # Log every minute
-            print(f"[MEMORY] Usage: {mem_mb:.1f} MB | Predictions: {bot.prediction_count}")
+            secondary_state = ""
+            if bot.predictor and bot.predictor.models_initialized:
+                secondary_state = f" | Secondary: {'loaded' if bot.predictor.secondary_loaded else 'unloaded'}"
+                deadlines = bot.predictor.deadline_stats()
+                if deadlines["requests"]:
+                    secondary_state += (f" | Deadlines missed: {deadlines['missed']}/{deadlines['requests']}"
+                                        f" (secondary skipped {deadlines['secondary_skipped'] + deadlines['secondary_cut']})")
+                content = bot.predictor.cache_stats().get("content")
+                if content and content["hits"] + content["misses"]:
+                    secondary_state += (f" | Content cache: {content['hits']} hits"
+                                        f" ({content['hit_ratio']:.1%} of URL misses, inference skipped)")
+                if bot.predictor.negative_cache.hits:
+                    secondary_state += (f" | Dead URLs skipped: {bot.predictor.negative_cache.hits}"
+                                        f" (~{bot.predictor.negative_seconds_saved:.0f}s saved)")
+                proxy = bot.predictor.media_proxy_stats()
+                if proxy["fetched"] or proxy["fallbacks"]:
+                    secondary_state += (f" | Proxy renditions: {proxy['fetched']} (avg {proxy['avg_kb']} KB,"
+                                        f" {proxy['fallbacks']} fallbacks)")
+                hedges = bot.predictor.hedge_stats()
+                if hedges and hedges["hedges"]:
+                    secondary_state += (f" | Hedged fetches: {hedges['hedges']}/{hedges['requests']}"
+                                        f" ({hedges['hedge_wins']} won)")
+                for host, limiter in bot.predictor.rate_limit_stats().items():
+                    secondary_state += (f" | {host}: {limiter['rate']}/s, queue {limiter['waiting']}"
+                                        f" (max {limiter['max_waiting']}), avg wait {limiter['avg_wait_ms']}ms,"
+                                        f" 429s {limiter['throttled']}")
+            print(f"[MEMORY] Usage: {mem_mb:.1f} MB | Predictions: {bot.prediction_count}{secondary_state}")
             
             # Force aggressive GC if memory > 400MB
             if mem_mb > 400:
@@ -113,86 +169,104 @@ async def memory_monitor():
             print(f"[MEMORY] Monitor error: {e}")
             await asyncio.sleep(60)
 
+COGS_TO_LOAD = [
+    'cogs.collection',
+    'cogs.shiny_hunt',
+    'cogs.settings',
+    'cogs.prediction',
+    'cogs.category',
+    'cogs.starboard_settings',
+    'cogs.starboard_catch',
+    'cogs.starboard_egg',
+    'cogs.starboard_unbox',
+    'cogs.help',
+]
+
+async def load_cogs():
+    """Load Jishaku and every cog, skipping extensions that are already loaded"""
+    try:
+        # Load Jishaku for debugging
+        if 'jishaku' not in bot.extensions:
+            await bot.load_extension('jishaku')
+            print("✅ Jishaku loaded")
+    except Exception as e:
+        print(f"⚠️ Could not load Jishaku: {e}")
+    
+    for cog in COGS_TO_LOAD:
+        if cog in bot.extensions:
+            continue
+        try:
+            await bot.load_extension(cog)
+            print(f"✅ Loaded {cog}")
+        except Exception as e:
+            print(f"❌ Failed to load {cog}: {e}")
+
 @bot.event
-async def on_ready():
-    print(f"Logged in as {bot.user}")
-    print(f"Bot prefix: {', '.join(BOT_PREFIX)}")
+async def setup_hook():
+    """One-time startup - runs once before the gateway connects, never again on reconnects"""
+    bot.startup_started = time.perf_counter()
     
     # Log initial memory
     initial_mem = bot.process.memory_info().rss / 1024 / 1024
     print(f"[MEMORY] Initial: {initial_mem:.1f} MB")
     
     # Initialize HTTP session first
+    stage_start = time.perf_counter()
     await initialize_http_session()
+    log_startup_stage("HTTP session", stage_start)
     
     # Initialize predictor (needs http_session for model downloads)
+    stage_start = time.perf_counter()
     await initialize_predictor()
+    log_startup_stage("Predictor", stage_start)
     
-    # Initialize models after predictor is created
-    if bot.predictor and bot.http_session:
-        try:
-            print("Downloading and initializing prediction models...")
-            await bot.predictor.initialize_models(bot.http_session)
-            print("✅ Dual model system ready!")
-            
-            # Log memory after model loading
-            post_model_mem = bot.process.memory_info().rss / 1024 / 1024
-            print(f"[MEMORY] After models loaded: {post_model_mem:.1f} MB")
-            
-        except Exception as e:
-            print(f"❌ Failed to initialize models: {e}")
+    # Models load in the background - spawns arriving before they are ready wait in a bounded backlog
+    if bot.predictor and bot.http_session and bot.model_loader is None:
+        bot.model_loader = asyncio.create_task(load_models_in_background())
     
     # Initialize database
+    stage_start = time.perf_counter()
     await initialize_database()
+    log_startup_stage("Database", stage_start)
     
     # Load cogs
-    cogs_to_load = [
-        'cogs.collection',
-        'cogs.shiny_hunt',
-        'cogs.settings',
-        'cogs.prediction',
-        'cogs.category',
-        'cogs.starboard_settings',
-        'cogs.starboard_catch',
-        'cogs.starboard_egg',
-        'cogs.starboard_unbox',
-        'cogs.help',
-    ]
+    stage_start = time.perf_counter()
+    await load_cogs()
+    log_startup_stage("Cogs", stage_start)
     
-    try:
-        # Load Jishaku for debugging
-        await bot.load_extension('jishaku')
-        print("✅ Jishaku loaded")
-    except Exception as e:
-        print(f"⚠️ Could not load Jishaku: {e}")
+    # Start keep-alive task and memory monitor (references kept so they are never duplicated or collected)
+    if not bot.background_tasks:
+        bot.background_tasks = [
+            asyncio.create_task(keep_alive()),
+            asyncio.create_task(memory_monitor()),
+        ]
+
+@bot.event
+async def on_ready():
+    """Runs on every gateway (re)connect - all setup lives in setup_hook, so this stays cheap"""
+    bot.ready_count += 1
+    if bot.ready_count > 1:
+        print(f"🔄 Reconnected as {bot.user} (ready #{bot.ready_count}), nothing to re-initialize")
+        return
     
-    loaded_count = 0
-    failed_count = 0
+    print(f"Logged in as {bot.user}")
+    print(f"Bot prefix: {', '.join(BOT_PREFIX)}")
     
-    for cog in cogs_to_load:
-        try:
-            await bot.load_extension(cog)
-            print(f"✅ Loaded {cog}")
-            loaded_count += 1
-        except Exception as e:
-            print(f"❌ Failed to load {cog}: {e}")
-            failed_count += 1
+    loaded_count = sum(1 for cog in COGS_TO_LOAD if cog in bot.extensions)
+    failed_count = len(COGS_TO_LOAD) - loaded_count
     
     print(f"\n{'='*50}")
     print(f"✅ Bot ready!")
-    print(f"📊 Loaded {loaded_count}/{len(cogs_to_load)} cogs")
+    print(f"📊 Loaded {loaded_count}/{len(COGS_TO_LOAD)} cogs")
     if failed_count > 0:
         print(f"⚠️ Failed to load {failed_count} cogs")
     print(f"🌐 Serving {len(bot.guilds)} guilds")
-    print(f"👥 Serving {sum(g.member_count for g in bot.guilds)} users")
+    print(f"👥 Serving {sum(g.member_count or 0 for g in bot.guilds)} users")
     print(f"🤖 Dual Model System: Primary (224x224) + Secondary (336x224)")
+    if bot.predictor:
+        print(f"🧠 Models: {bot.predictor.state}")
+    print(f"⏱️ Ready in {time.perf_counter() - bot.startup_started:.2f}s")
     print(f"{'='*50}\n")
-    
-    # Start keep-alive task
-    asyncio.create_task(keep_alive())
-    
-    # ADD THIS: Start memory monitor
-    asyncio.create_task(memory_monitor())
 
 @bot.event
 async def on_message_edit(before, after):
@@ -249,6 +323,9 @@ async def cleanup():
     if bot.db:
         bot.db.close()
 
+    if bot.predictor:
+        bot.predictor.close()
+
 def main():
     if not TOKEN:
         print("❌ Error: DISCORD_TOKEN environment variable not set")
@@ -0,0 +1,823 @@
+"""
+Offline ONNX model preparation shared by predict.py
+
+Usage:
+    python model_tools.py optimize
+    python model_tools.py manifest --output manifest.json
+    python model_tools.py quantize --mode dynamic
+    python model_tools.py quantize --mode static --calibration-images data/calibration
+    python model_tools.py evaluate-quantized --images data/labelled --mode dynamic
+    python model_tools.py benchmark-preprocess --images data/spawns --reducing-gap 2.0
+    python model_tools.py benchmark-preprocess --urls spawn_urls.txt
+
+Labelled image folders use one sub-folder per class name, e.g.
+data/labelled/Pikachu-Female/spawn1.png.
+"""
+import argparse
+import hashlib
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import onnxruntime as ort
+from PIL import Image
+
+# ImageNet normalization shared by the NumPy path and the in-graph preprocessing
+IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+OPTIMIZATION_LEVELS = {
+    "basic": ort.GraphOptimizationLevel.ORT_ENABLE_BASIC,
+    "extended": ort.GraphOptimizationLevel.ORT_ENABLE_EXTENDED,
+    "all": ort.GraphOptimizationLevel.ORT_ENABLE_ALL,
+}
+
+
+def external_data_path(model_path: str) -> Optional[str]:
+    """Get the external weights file that sits next to a model, if any"""
+    data_path = model_path + ".data"
+    return data_path if os.path.exists(data_path) else None
+
+
+def file_sha256(path: str) -> str:
+    """
+    SHA-256 of a file, memoized in a <path>.sha256 sidecar
+
+    The sidecar is keyed on size and mtime, so multi-hundred-MB weight files
+    are only hashed again when they actually change.
+    """
+    stat = os.stat(path)
+    sidecar = path + ".sha256"
+    try:
+        with open(sidecar, "r", encoding="utf-8") as f:
+            memo = json.load(f)
+        if memo.get("size") == stat.st_size and memo.get("mtime_ns") == stat.st_mtime_ns:
+            return memo["sha256"]
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha256 = hash_file(path)
+    remember_sha256(path, sha256, stat)
+    return sha256
+
+
+def hash_file(path: str) -> str:
+    """SHA-256 of a file, streamed in 1 MB blocks (never memoized)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def remember_sha256(path: str, sha256: str, stat: Optional[os.stat_result] = None):
+    """Record an already known SHA-256 in the sidecar so file_sha256 won't hash the file again"""
+    stat = stat or os.stat(path)
+    try:
+        with open(path + ".sha256", "w", encoding="utf-8") as f:
+            json.dump({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": sha256}, f)
+    except OSError:
+        pass
+
+
+def model_checksum(model_path: str) -> str:
+    """Checksum covering the model graph and its external weights"""
+    digest = hashlib.sha256(file_sha256(model_path).encode())
+    data_path = external_data_path(model_path)
+    if data_path:
+        digest.update(file_sha256(data_path).encode())
+    return digest.hexdigest()
+
+
+def session_options(level: str = "basic") -> ort.SessionOptions:
+    """Ultra-minimal CPU session options used for every model"""
+    sess_opts = ort.SessionOptions()
+    sess_opts.intra_op_num_threads = 1
+    sess_opts.inter_op_num_threads = 1
+    sess_opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+    sess_opts.graph_optimization_level = (
+        ort.GraphOptimizationLevel.ORT_DISABLE_ALL if level == "none" else OPTIMIZATION_LEVELS[level]
+    )
+    sess_opts.enable_mem_pattern = False
+    sess_opts.enable_cpu_mem_arena = False
+    return sess_opts
+
+
+def create_session(model_path: str, level: str = "basic") -> ort.InferenceSession:
+    """Create a CPU inference session"""
+    return ort.InferenceSession(model_path, sess_options=session_options(level),
+                                providers=["CPUExecutionProvider"])
+
+
+def random_inputs(session: ort.InferenceSession, batch_size: int = 2, seed: int = 0) -> Dict[str, np.ndarray]:
+    """Synthetic inputs matching a session's input signature (symbolic dims become batch_size)"""
+    rng = np.random.default_rng(seed)
+    feeds = {}
+    for model_input in session.get_inputs():
+        shape = [dim if isinstance(dim, int) and dim > 0 else batch_size for dim in model_input.shape]
+        if model_input.type == "tensor(uint8)":
+            feeds[model_input.name] = rng.integers(0, 256, size=shape, dtype=np.uint8)
+        else:
+            feeds[model_input.name] = rng.standard_normal(shape).astype(np.float32)
+    return feeds
+
+
+def outputs_match(expected: List[np.ndarray], actual: List[np.ndarray],
+                  atol: float = 1e-3, rtol: float = 1e-3) -> bool:
+    """Check two models' outputs for the same batch agree
+
+    Takes outputs rather than sessions so callers can drop the reference
+    session before loading the candidate - only one copy of a large model's
+    weights is ever in memory during verification.
+    """
+    return all(np.allclose(e, a, atol=atol, rtol=rtol) for e, a in zip(expected, actual))
+
+
+def cpu_features_tag() -> str:
+    """Short digest of the CPU's instruction-set flags (falls back to the processor name)"""
+    flags = ""
+    try:
+        with open("/proc/cpuinfo", "r", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith(("flags", "Features")):
+                    flags = " ".join(sorted(line.split(":", 1)[1].split()))
+                    break
+    except OSError:
+        pass
+    return hashlib.sha256((flags or platform.processor()).encode()).hexdigest()[:8]
+
+
+def optimized_model_path(model_path: str, cache_dir: str, level: str) -> str:
+    """Location of the serialized optimized graph for this exact model/runtime/CPU combination"""
+    tag = f"{model_checksum(model_path)[:16]}.{level}.ort{ort.__version__}.{platform.machine()}"
+    if level == "all":
+        # ORT_ENABLE_ALL graphs bake in NCHWc layouts chosen for this CPU's instruction set
+        tag += f".cpu{cpu_features_tag()}"
+    return os.path.join(cache_dir, "optimized", f"{_model_stem(model_path)}.{tag}.onnx")
+
+
+def prepare_optimized_model(model_path: str, cache_dir: str, level: str = "extended") -> str:
+    """
+    Get a fully optimized, serialized copy of a model, building it on first use
+
+    The optimized graph is written once per model checksum and verified
+    against the original graph on synthetic input. Later starts load it with
+    optimizations disabled, skipping graph optimization entirely. Falls back
+    to the original model path if optimization or verification fails.
+    """
+    if level == "basic":
+        return model_path
+
+    target = optimized_model_path(model_path, cache_dir, level)
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=os.path.dirname(target))
+    try:
+        staged_model = os.path.join(staging, os.path.basename(target))
+        sess_opts = session_options(level)
+        sess_opts.optimized_model_filepath = staged_model
+        if external_data_path(model_path):
+            # Keep large initializers out of the protobuf (2GB limit, faster load)
+            sess_opts.add_session_config_entry(
+                "session.optimized_model_external_initializers_file_name",
+                os.path.basename(target) + ".data"
+            )
+            sess_opts.add_session_config_entry(
+                "session.optimized_model_external_initializers_min_size_in_bytes", "1024"
+            )
+        # Reference outputs come from the original graph with no optimization at all
+        reference = create_session(model_path, level="none")
+        feeds = random_inputs(reference)
+        expected = reference.run(None, feeds)
+        del reference
+
+        # Creating this session writes the optimized graph; it is never run
+        ort.InferenceSession(model_path, sess_options=sess_opts, providers=["CPUExecutionProvider"])
+
+        candidate = create_session(staged_model, level="none")
+        actual = candidate.run(None, feeds)
+        del candidate
+        if not outputs_match(expected, actual):
+            print(f"⚠️ Optimized {os.path.basename(model_path)} does not match the original, using original")
+            return model_path
+
+        _publish_staged(staging, target)
+        print(f"✅ Optimized model cached: {os.path.basename(target)}")
+        return target
+    except Exception as e:
+        print(f"⚠️ Could not optimize {os.path.basename(model_path)}: {e}")
+        return model_path
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def normalize_uint8_nhwc(batch: np.ndarray) -> np.ndarray:
+    """Normalize a uint8 (N, H, W, 3) batch into the float32 (N, 3, H, W) tensor the FP32 models expect"""
+    normalized = batch.astype(np.float32)
+    normalized /= 255.0
+    normalized -= IMAGENET_MEAN
+    normalized /= IMAGENET_STD
+    return np.ascontiguousarray(normalized.transpose(0, 3, 1, 2))
+
+
+def uint8_input_model_path(model_path: str, cache_dir: str) -> str:
+    """Location of the uint8 NHWC input variant of a model"""
+    tag = f"{model_checksum(model_path)[:16]}.uint8-nhwc"
+    return os.path.join(cache_dir, "uint8", f"{_model_stem(model_path)}.{tag}.onnx")
+
+
+def build_uint8_input_model(model_path: str, output_path: str):
+    """
+    Write a copy of a model that takes uint8 (N, H, W, 3) pixels
+
+    The new input feeds Transpose -> Cast -> Mul -> Add nodes that produce
+    the original normalized NCHW input, so callers hand over raw resized
+    pixels and ONNX Runtime does the layout change and normalization.
+    """
+    import onnx
+    from onnx import TensorProto, helper, numpy_helper
+
+    model = onnx.load(model_path)
+    graph = model.graph
+    initializer_names = {init.name for init in graph.initializer}
+    original_input = next(i for i in graph.input if i.name not in initializer_names)
+
+    dims = original_input.type.tensor_type.shape.dim
+    if len(dims) != 4 or dims[1].dim_value not in (0, 3):
+        raise ValueError(f"Expected an (N, 3, H, W) input, got {len(dims)} dims")
+
+    def dim(d):
+        return d.dim_param or d.dim_value or None
+
+    new_input = helper.make_tensor_value_info(
+        original_input.name + "_uint8", TensorProto.UINT8,
+        [dim(dims[0]), dim(dims[2]), dim(dims[3]), 3]
+    )
+    prefix = original_input.name + "_preprocess"
+    # (x / 255 - mean) / std == x * scale + bias
+    scale = (1.0 / (255.0 * IMAGENET_STD)).reshape(3, 1, 1).astype(np.float32)
+    bias = (-IMAGENET_MEAN / IMAGENET_STD).reshape(3, 1, 1).astype(np.float32)
+    graph.initializer.extend([
+        numpy_helper.from_array(scale, prefix + "_scale"),
+        numpy_helper.from_array(bias, prefix + "_bias"),
+    ])
+
+    # Transpose while still uint8 - a quarter of the bytes to move
+    nodes = [
+        helper.make_node("Transpose", [new_input.name], [prefix + "_nchw"], perm=[0, 3, 1, 2]),
+        helper.make_node("Cast", [prefix + "_nchw"], [prefix + "_float"], to=TensorProto.FLOAT),
+        helper.make_node("Mul", [prefix + "_float", prefix + "_scale"], [prefix + "_scaled"]),
+        helper.make_node("Add", [prefix + "_scaled", prefix + "_bias"], [original_input.name]),
+    ]
+    existing_nodes = list(graph.node)
+    del graph.node[:]
+    graph.node.extend(nodes + existing_nodes)
+
+    inputs = [new_input if i.name == original_input.name else i for i in graph.input]
+    del graph.input[:]
+    graph.input.extend(inputs)
+
+    if external_data_path(model_path):
+        onnx.save_model(model, output_path, save_as_external_data=True, all_tensors_to_one_file=True,
+                        location=os.path.basename(output_path) + ".data", size_threshold=1024)
+    else:
+        onnx.save_model(model, output_path)
+
+
+def prepare_uint8_input_model(model_path: str, cache_dir: str) -> str:
+    """
+    Get the uint8 NHWC input variant of a model, building it on first use
+
+    The variant is verified against the NumPy normalization path on random
+    pixels before it is used. Falls back to the original model path (float
+    NCHW input) if wrapping or verification fails.
+    """
+    target = uint8_input_model_path(model_path, cache_dir)
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=os.path.dirname(target))
+    try:
+        staged_model = os.path.join(staging, os.path.basename(target))
+        build_uint8_input_model(model_path, staged_model)
+
+        # One session at a time - the reference is released before the candidate loads
+        reference = create_session(model_path)
+        batch, _, height, width = next(iter(random_inputs(reference).values())).shape
+        pixels = np.random.default_rng(0).integers(0, 256, size=(batch, height, width, 3), dtype=np.uint8)
+        expected = reference.run(None, {reference.get_inputs()[0].name: normalize_uint8_nhwc(pixels)})
+        del reference
+
+        candidate = create_session(staged_model)
+        actual = candidate.run(None, {candidate.get_inputs()[0].name: pixels})
+        del candidate
+        if not outputs_match(expected, actual):
+            print(f"⚠️ uint8 input variant of {os.path.basename(model_path)} does not match, using float input")
+            return model_path
+
+        _publish_staged(staging, target)
+        print(f"✅ uint8 input model cached: {os.path.basename(target)}")
+        return target
+    except Exception as e:
+        print(f"⚠️ Could not build uint8 input model for {os.path.basename(model_path)}: {e}")
+        return model_path
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".webp", ".gif")
+QUANTIZATION_MODES = ("dynamic", "static")
+
+# Resize filters selectable per model (PREDICTION_RESAMPLE), cheapest first
+RESAMPLE_FILTERS = {
+    "nearest": Image.NEAREST,
+    "box": Image.BOX,
+    "bilinear": Image.BILINEAR,
+    "hamming": Image.HAMMING,
+    "bicubic": Image.BICUBIC,
+    "lanczos": Image.LANCZOS,
+}
+
+
+def _model_stem(model_path: str) -> str:
+    stem = os.path.basename(model_path)
+    return stem[:-5] if stem.endswith(".onnx") else stem
+
+
+def _publish_staged(staging: str, target: str):
+    """Move a staged build into place - weights first, graph last (the graph marks a complete build)"""
+    for name in sorted(os.listdir(staging), key=lambda n: n == os.path.basename(target)):
+        os.replace(os.path.join(staging, name), os.path.join(os.path.dirname(target), name))
+
+
+def iter_images(image_dir: str) -> Iterator[str]:
+    """Yield image file paths under a folder (recursively, sorted)"""
+    for root, _, files in sorted(os.walk(image_dir)):
+        for name in sorted(files):
+            if name.lower().endswith(IMAGE_EXTENSIONS):
+                yield os.path.join(root, name)
+
+
+def iter_labelled_images(image_dir: str) -> Iterator[Tuple[str, str]]:
+    """Yield (label, path) pairs from a folder with one sub-folder per class name"""
+    for label in sorted(os.listdir(image_dir)):
+        label_dir = os.path.join(image_dir, label)
+        if os.path.isdir(label_dir):
+            for path in iter_images(label_dir):
+                yield label, path
+
+
+def load_image_tensor(path: str, width: int, height: int) -> np.ndarray:
+    """Preprocess an image file exactly like the live prediction path"""
+    from predict import Prediction
+
+    with open(path, "rb") as f:
+        img = Prediction._decode_image(f.read())
+    try:
+        return Prediction._rgb_image_to_tensor(img, width, height)
+    finally:
+        img.close()
+
+
+def model_input_sizes() -> Dict[str, Tuple[str, int, int]]:
+    """Model name -> (path, width, height) for both live models"""
+    import predict
+
+    metadata = predict.load_secondary_metadata()
+    return {
+        "primary": (predict.PRIMARY_ONNX_PATH, 224, 224),
+        "secondary": (predict.SECONDARY_ONNX_PATH, metadata["image_width"], metadata["image_height"]),
+    }
+
+
+class ImageCalibrationReader:
+    """Feeds preprocessed calibration images to the static quantizer"""
+    def __init__(self, input_name: str, image_paths: List[str], width: int, height: int):
+        self.input_name = input_name
+        self.width = width
+        self.height = height
+        self._paths = iter(image_paths)
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        path = next(self._paths, None)
+        if path is None:
+            return None
+        return {self.input_name: load_image_tensor(path, self.width, self.height)}
+
+
+def quantized_model_path(model_path: str, cache_dir: str, mode: str) -> str:
+    """Location of the INT8 variant of a model"""
+    tag = f"{model_checksum(model_path)[:16]}.int8-{mode}"
+    return os.path.join(cache_dir, "quantized", f"{_model_stem(model_path)}.{tag}.onnx")
+
+
+def quantize_model(model_path: str, cache_dir: str, mode: str = "dynamic",
+                   calibration_images: Optional[List[str]] = None,
+                   input_size: Optional[Tuple[int, int]] = None) -> str:
+    """
+    Build the INT8 variant of a model (requires the onnx package)
+
+    Dynamic mode quantizes weights only and needs no data. Static mode
+    (QDQ, per-channel) also quantizes activations, calibrated on real
+    spawn images preprocessed like the live path.
+    """
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_dynamic, quantize_static
+
+    if mode not in QUANTIZATION_MODES:
+        raise ValueError(f"Unknown quantization mode: {mode}")
+
+    target = quantized_model_path(model_path, cache_dir, mode)
+    if os.path.exists(target):
+        return target
+
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    staging = tempfile.mkdtemp(prefix=".staging-", dir=os.path.dirname(target))
+    try:
+        staged_model = os.path.join(staging, os.path.basename(target))
+        use_external_data = external_data_path(model_path) is not None
+
+        if mode == "dynamic":
+            # CPU ConvInteger kernels need uint8 weights
+            quantize_dynamic(model_path, staged_model, weight_type=QuantType.QUInt8,
+                             use_external_data_format=use_external_data)
+        else:
+            if not calibration_images or not input_size:
+                raise ValueError("Static quantization needs calibration images and the model input size")
+            input_name = create_session(model_path).get_inputs()[0].name
+            reader = ImageCalibrationReader(input_name, calibration_images, *input_size)
+            quantize_static(model_path, staged_model, reader, quant_format=QuantFormat.QDQ,
+                            per_channel=True, activation_type=QuantType.QUInt8,
+                            weight_type=QuantType.QInt8, use_external_data_format=use_external_data)
+
+        _publish_staged(staging, target)
+        print(f"✅ Quantized model cached: {os.path.basename(target)}")
+        return target
+    finally:
+        shutil.rmtree(staging, ignore_errors=True)
+
+
+def prepare_quantized_model(model_path: str, cache_dir: str, mode: str) -> str:
+    """
+    Get the INT8 variant of a model for the runtime switch
+
+    Dynamic variants are built on demand. Static variants need calibration
+    data, so they must be built offline with `python model_tools.py quantize`.
+    Falls back to the FP32 model when no variant is available.
+    """
+    target = quantized_model_path(model_path, cache_dir, mode)
+    if os.path.exists(target):
+        return target
+
+    if mode != "dynamic":
+        print(f"⚠️ No {mode} INT8 model for {os.path.basename(model_path)}, using FP32 "
+              f"(build it with: python model_tools.py quantize --mode {mode})")
+        return model_path
+
+    try:
+        return quantize_model(model_path, cache_dir, mode)
+    except Exception as e:
+        print(f"⚠️ Could not quantize {os.path.basename(model_path)}, using FP32: {e}")
+        return model_path
+
+
+def _softmax(x: np.ndarray) -> np.ndarray:
+    exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return exp_x / np.sum(exp_x, axis=-1, keepdims=True)
+
+
+def evaluate_quantized(image_dir: str, cache_dir: str, mode: str = "dynamic") -> Dict[str, dict]:
+    """
+    Compare INT8 models against FP32 on a folder of labelled images
+
+    Reports, per model: top-1 agreement with FP32, accuracy of both against
+    the folder labels, top-1 confidence drift and mean inference latency.
+    """
+    import predict
+
+    class_names = {
+        "primary": predict.load_primary_class_names(),
+        "secondary": predict.load_secondary_metadata()["class_names"],
+    }
+    labelled = list(iter_labelled_images(image_dir))
+    if not labelled:
+        raise ValueError(f"No labelled images found in {image_dir}")
+
+    report = {}
+    for model_name, (model_path, width, height) in model_input_sizes().items():
+        quantized_path = quantized_model_path(model_path, cache_dir, mode)
+        if not os.path.exists(quantized_path):
+            print(f"⚠️ Skipping {model_name}: no {mode} INT8 model (run quantize first)")
+            continue
+
+        names = [name.lower() for name in class_names[model_name]]
+        fp32 = create_session(model_path)
+        int8 = create_session(quantized_path)
+        input_name = fp32.get_inputs()[0].name
+
+        agree = fp32_correct = int8_correct = 0
+        drifts = []
+        fp32_seconds = int8_seconds = 0.0
+        for label, path in labelled:
+            feeds = {input_name: load_image_tensor(path, width, height)}
+
+            start = time.perf_counter()
+            fp32_probs = _softmax(fp32.run(None, feeds)[0][0])
+            fp32_seconds += time.perf_counter() - start
+
+            start = time.perf_counter()
+            int8_probs = _softmax(int8.run(None, feeds)[0][0])
+            int8_seconds += time.perf_counter() - start
+
+            fp32_idx = int(np.argmax(fp32_probs))
+            int8_idx = int(np.argmax(int8_probs))
+            agree += fp32_idx == int8_idx
+            fp32_correct += fp32_idx < len(names) and names[fp32_idx] == label.lower()
+            int8_correct += int8_idx < len(names) and names[int8_idx] == label.lower()
+            drifts.append(abs(float(fp32_probs[fp32_idx]) - float(int8_probs[fp32_idx])))
+
+        count = len(labelled)
+        report[model_name] = {
+            "images": count,
+            "top1_agreement": agree / count,
+            "fp32_accuracy": fp32_correct / count,
+            "int8_accuracy": int8_correct / count,
+            "mean_confidence_drift": float(np.mean(drifts)),
+            "max_confidence_drift": float(np.max(drifts)),
+            "fp32_ms": fp32_seconds / count * 1000,
+            "int8_ms": int8_seconds / count * 1000,
+        }
+    return report
+
+
+def _download(url: str, timeout: float = 15.0) -> bytes:
+    """Fetch a URL's body (benchmark helper - the bot itself fetches with aiohttp)"""
+    from urllib.request import Request, urlopen
+
+    request = Request(url, headers={"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"})
+    with urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def load_benchmark_samples(image_dir: Optional[str] = None,
+                           urls: Optional[List[str]] = None) -> List[Tuple[bytes, Optional[bytes]]]:
+    """
+    Collect (original bytes, media proxy rendition bytes or None) pairs
+
+    Local images have no rendition. Discord attachment URLs (freshly
+    signed) are downloaded both directly and as the rendition predict.py
+    would request with PREDICTION_MEDIA_PROXY on.
+    """
+    from cdn_utils import media_proxy_url
+    from config import PREDICTION_MEDIA_PROXY_FORMAT, PREDICTION_MEDIA_PROXY_OVERSAMPLE
+
+    samples = []
+    if image_dir:
+        for path in iter_images(image_dir):
+            with open(path, "rb") as f:
+                samples.append((f.read(), None))
+
+    if urls:
+        sizes = model_input_sizes().values()
+        box = (int(np.ceil(max(width for _, width, _ in sizes) * PREDICTION_MEDIA_PROXY_OVERSAMPLE)),
+               int(np.ceil(max(height for _, _, height in sizes) * PREDICTION_MEDIA_PROXY_OVERSAMPLE)))
+        for url in urls:
+            try:
+                original = _download(url)
+                proxied = media_proxy_url(url, *box, PREDICTION_MEDIA_PROXY_FORMAT)
+                samples.append((original, _download(proxied) if proxied else None))
+            except Exception as e:
+                print(f"⚠️ Skipping {url}: {e}")
+
+    if not samples:
+        raise ValueError("No benchmark images (give --images and/or --urls)")
+    return samples
+
+
+def benchmark_preprocess(samples: List[Tuple[bytes, Optional[bytes]]], filters: List[str],
+                         reducing_gaps: List[Optional[float]]) -> Dict[str, dict]:
+    """
+    Compare cheaper preprocessing settings against the reference pipeline
+
+    The reference is what predict.py does by default: full decode of the
+    original image, then a LANCZOS resize. Every combination of resize
+    filter, draft decoding (on and off) and reducing gap runs on each
+    image for each model - on the original bytes, and on the media proxy
+    rendition where a sample has one. Reported per setting: mean
+    preprocessing time (decode + resize), mean bytes, top-1 agreement with
+    the reference, and top-1 confidence drift.
+
+    Timing covers decode plus the uint8 resize the live path feeds to the
+    uint8-input graphs. NumPy normalization for the FP32 models used to
+    score accuracy happens outside the timed section.
+    """
+    from predict import Prediction
+
+    sizes = model_input_sizes()
+    # One decode feeds every model stage, so the draft must cover the largest input
+    draft_size = (max(width for _, width, _ in sizes.values()),
+                  max(height for _, _, height in sizes.values()))
+    sources = ["original"] + (["proxy"] if any(proxied for _, proxied in samples) else [])
+    settings = [(source, name, draft, gap) for source in sources for name in filters
+                for draft in (False, True) for gap in reducing_gaps]
+
+    report = {}
+    for model_name, (model_path, width, height) in sizes.items():
+        session = create_session(model_path)
+        input_name = session.get_inputs()[0].name
+
+        def run(image_data: bytes, resample: int, draft: bool, gap: Optional[float]) -> Tuple[float, np.ndarray]:
+            start = time.perf_counter()
+            img = Prediction._decode_image(image_data, draft_size if draft else None)
+            try:
+                pixels = Prediction._rgb_image_to_uint8(img, width, height, resample, gap)
+            finally:
+                img.close()
+            seconds = time.perf_counter() - start
+            return seconds, _softmax(session.run(None, {input_name: normalize_uint8_nhwc(pixels)})[0][0])
+
+        references = [run(original, Image.LANCZOS, False, None)[1] for original, _ in samples]
+        rows = []
+        for source, name, draft, gap in settings:
+            pairs = [(original if source == "original" else proxied, reference)
+                     for (original, proxied), reference in zip(samples, references)
+                     if source == "original" or proxied]
+            seconds = 0.0
+            agree = 0
+            drifts = []
+            for image_data, reference in pairs:
+                elapsed, probs = run(image_data, RESAMPLE_FILTERS[name], draft, gap)
+                seconds += elapsed
+                reference_idx = int(np.argmax(reference))
+                agree += int(np.argmax(probs)) == reference_idx
+                drifts.append(abs(float(reference[reference_idx]) - float(probs[reference_idx])))
+            rows.append({
+                "source": source,
+                "filter": name,
+                "draft": draft,
+                "reducing_gap": gap,
+                "images": len(pairs),
+                "avg_kb": sum(len(image_data) for image_data, _ in pairs) / len(pairs) / 1024,
+                "preprocess_ms": seconds / len(pairs) * 1000,
+                "top1_agreement": agree / len(pairs),
+                "mean_confidence_drift": float(np.mean(drifts)),
+                "max_confidence_drift": float(np.max(drifts)),
+            })
+        report[model_name] = {"images": len(samples), "settings": sorted(rows, key=lambda r: r["preprocess_ms"])}
+    return report
+
+
+def describe_proxy_renditions(samples: List[Tuple[bytes, Optional[bytes]]]) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """(original size, rendition size) for every sample with a media proxy rendition"""
+    import io
+
+    pairs = []
+    for original, proxied in samples:
+        if proxied:
+            with Image.open(io.BytesIO(original)) as source, Image.open(io.BytesIO(proxied)) as rendition:
+                pairs.append((source.size, rendition.size))
+    return pairs
+
+
+def _cmd_optimize(args) -> int:
+    import predict
+
+    for model_path, _, _ in model_input_sizes().values():
+        prepare_optimized_model(model_path, predict.CACHE_DIR, args.level)
+    return 0
+
+
+def build_manifest(paths: List[str]) -> Dict[str, dict]:
+    """Size and SHA-256 of each file, keyed by file name (the format ModelDownloader verifies against)"""
+    return {os.path.basename(path): {"size": os.path.getsize(path), "sha256": file_sha256(path)}
+            for path in paths}
+
+
+def _cmd_manifest(args) -> int:
+    import predict
+
+    manifest = build_manifest(predict.model_file_paths())
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    print(f"✅ Wrote {args.output} for {len(manifest)} files - publish it next to the models")
+    return 0
+
+
+def _cmd_quantize(args) -> int:
+    import predict
+
+    calibration_images = list(iter_images(args.calibration_images)) if args.calibration_images else None
+    for model_path, width, height in model_input_sizes().values():
+        quantize_model(model_path, predict.CACHE_DIR, args.mode, calibration_images, (width, height))
+    return 0
+
+
+def _cmd_evaluate_quantized(args) -> int:
+    import predict
+
+    report = evaluate_quantized(args.images, predict.CACHE_DIR, args.mode)
+    acceptable = True
+    for model_name, stats in report.items():
+        print(f"\n{model_name} ({stats['images']} images, INT8 {args.mode})")
+        print(f"  Top-1 agreement:   {stats['top1_agreement']:.2%}")
+        print(f"  Accuracy FP32/INT8: {stats['fp32_accuracy']:.2%} / {stats['int8_accuracy']:.2%}")
+        print(f"  Confidence drift:  mean {stats['mean_confidence_drift']:.4f}, max {stats['max_confidence_drift']:.4f}")
+        print(f"  Latency FP32/INT8: {stats['fp32_ms']:.1f} ms / {stats['int8_ms']:.1f} ms")
+        if 1 - stats["top1_agreement"] > args.max_disagreement:
+            acceptable = False
+
+    if acceptable:
+        print(f"\n✅ INT8 {args.mode} is within {args.max_disagreement:.2%} top-1 disagreement")
+        return 0
+    print(f"\n❌ INT8 {args.mode} exceeds {args.max_disagreement:.2%} top-1 disagreement - keep FP32")
+    return 1
+
+
+def _cmd_benchmark_preprocess(args) -> int:
+    urls = None
+    if args.urls:
+        with open(args.urls, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    samples = load_benchmark_samples(args.images, urls)
+    renditions = describe_proxy_renditions(samples)
+    if renditions:
+        stretched = sum(1 for (ow, oh), (rw, rh) in renditions if abs(ow / oh - rw / rh) > 0.02)
+        print(f"Media proxy renditions: {len(renditions)} "
+              f"(e.g. {renditions[0][0][0]}x{renditions[0][0][1]} -> {renditions[0][1][0]}x{renditions[0][1][1]}), "
+              f"{stretched} with a changed aspect ratio")
+
+    reducing_gaps = [None] + [gap for gap in args.reducing_gap if gap]
+    report = benchmark_preprocess(samples, args.filters, reducing_gaps)
+    for model_name, stats in report.items():
+        print(f"\n{model_name} ({stats['images']} images, vs full original decode + lanczos)")
+        print(f"  {'source':<9} {'filter':<9} {'draft':<6} {'gap':<5} {'KB':>7} {'ms':>7} "
+              f"{'top-1 agree':>12} {'drift mean/max':>16}")
+        cheapest = None
+        for row in stats["settings"]:
+            gap = "-" if row["reducing_gap"] is None else f"{row['reducing_gap']:g}"
+            print(f"  {row['source']:<9} {row['filter']:<9} {'on' if row['draft'] else 'off':<6} {gap:<5}"
+                  f" {row['avg_kb']:>7.1f} {row['preprocess_ms']:>7.2f}"
+                  f" {row['top1_agreement']:>12.2%} {row['mean_confidence_drift']:>8.4f}/{row['max_confidence_drift']:.4f}")
+            if cheapest is None and 1 - row["top1_agreement"] <= args.max_disagreement:
+                cheapest = row
+        if cheapest is None:
+            print(f"  ❌ No setting within {args.max_disagreement:.2%} top-1 disagreement - keep lanczos")
+        else:
+            print(f"  ✅ Cheapest within {args.max_disagreement:.2%} top-1 disagreement: source={cheapest['source']}, "
+                  f"filter={cheapest['filter']}, draft={'on' if cheapest['draft'] else 'off'}, "
+                  f"reducing_gap={cheapest['reducing_gap']}")
+    print("\nPREDICTION_RESAMPLE is per model; PREDICTION_MEDIA_PROXY, PREDICTION_DRAFT_DECODE and "
+          "PREDICTION_RESIZE_REDUCING_GAP are shared by both")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Prepare and evaluate prediction models")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    optimize = commands.add_parser("optimize", help="Build cached optimized graphs")
+    optimize.add_argument("--level", choices=["extended", "all"], default="extended")
+    optimize.set_defaults(func=_cmd_optimize)
+
+    manifest = commands.add_parser("manifest", help="Write the size/SHA-256 manifest for the cached model files")
+    manifest.add_argument("--output", default="manifest.json")
+    manifest.set_defaults(func=_cmd_manifest)
+
+    quantize = commands.add_parser("quantize", help="Build INT8 model variants")
+    quantize.add_argument("--mode", choices=QUANTIZATION_MODES, default="dynamic")
+    quantize.add_argument("--calibration-images", help="Image folder for static calibration")
+    quantize.set_defaults(func=_cmd_quantize)
+
+    evaluate = commands.add_parser("evaluate-quantized", help="Compare INT8 against FP32 on labelled images")
+    evaluate.add_argument("--images", required=True, help="Folder with one sub-folder per class name")
+    evaluate.add_argument("--mode", choices=QUANTIZATION_MODES, default="dynamic")
+    evaluate.add_argument("--max-disagreement", type=float, default=0.01,
+                          help="Largest acceptable top-1 disagreement with FP32 (default 1%%)")
+    evaluate.set_defaults(func=_cmd_evaluate_quantized)
+
+    benchmark = commands.add_parser("benchmark-preprocess",
+                                    help="Time draft decoding and resize filters against the LANCZOS pipeline")
+    benchmark.add_argument("--images", help="Folder of sample spawn images (searched recursively)")
+    benchmark.add_argument("--urls", help="File of fresh Discord attachment URLs, one per line - "
+                                          "also benchmarks the media proxy renditions")
+    benchmark.add_argument("--filters", nargs="+", choices=list(RESAMPLE_FILTERS), default=list(RESAMPLE_FILTERS))
+    benchmark.add_argument("--reducing-gap", type=float, nargs="*", default=[],
+                           help="Reducing gaps to try besides none, e.g. 2.0 3.0")
+    benchmark.add_argument("--max-disagreement", type=float, default=0.01,
+                           help="Largest acceptable top-1 disagreement with LANCZOS (default 1%%)")
+    benchmark.set_defaults(func=_cmd_benchmark_preprocess)
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,23 +3,81 @@ import numpy as np
 import aiohttp
 from PIL import Image
 import io
+import math
 import os
 import json
 import time
 import hashlib
+import shutil
 import asyncio
 import gc
-from typing import Optional, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, NamedTuple, Optional, Tuple
+from urllib.parse import urlsplit
+from cache import DiskCache, LRUCache, SingleFlight
+from cdn_utils import DISCORD_CDN_HOSTS, canonicalize_image_url, is_discord_cdn_url, media_proxy_url
+from rate_limit import HostRateLimiter, parse_retry_after
+from hedge import HedgePolicy
+from model_tools import (
+    create_session,
+    file_sha256,
+    hash_file,
+    remember_sha256,
+    normalize_uint8_nhwc,
+    prepare_optimized_model,
+    prepare_quantized_model,
+    prepare_uint8_input_model,
+    RESAMPLE_FILTERS,
+)
+from starboard_utils import load_cdn_mapping
+from utils import LabelInfo, build_label_info, build_pokemon_name_index, load_pokemon_data
+from config import (
+    PREDICTION_BATCH_WINDOW_MS,
+    PREDICTION_MAX_BATCH_SIZE,
+    PREDICTION_WORKERS,
+    PREDICTION_CACHE_SIZE,
+    PREDICTION_CACHE_TTL,
+    PREDICTION_CONTENT_CACHE,
+    PREDICTION_DISK_CACHE,
+    PREDICTION_DISK_CACHE_SIZE,
+    PREDICTION_DISK_CACHE_TTL,
+    PREDICTION_NEGATIVE_CACHE_SIZE,
+    PREDICTION_NEGATIVE_CACHE_TTL,
+    PREDICTION_TOP_K,
+    PREDICTION_WARMUP,
+    PREDICTION_WARMUP_CDN_CONNECTIONS,
+    PREDICTION_PRE_READY_BACKLOG,
+    PREDICTION_PRE_READY_WAIT,
+    PREDICTION_LOW_MEMORY_MODE,
+    SECONDARY_IDLE_UNLOAD_SECONDS,
+    MODEL_GRAPH_OPTIMIZATION,
+    PREDICTION_QUANTIZED_MODE,
+    PREDICTION_UINT8_INPUT,
+    PREDICTION_DRAFT_DECODE,
+    PREDICTION_RESAMPLE,
+    PREDICTION_RESIZE_REDUCING_GAP,
+    MODEL_REPO_BASE,
+    MODEL_DOWNLOAD_PARALLEL_MIN_MB,
+    MODEL_DOWNLOAD_PARALLEL_CHUNKS,
+    CDN_RATE_LIMIT_INITIAL,
+    CDN_RATE_LIMIT_MIN,
+    CDN_RATE_LIMIT_MAX,
+    CDN_RATE_LIMIT_BURST,
+    CDN_RATE_LIMIT_INCREASE,
+    PREDICTION_MEDIA_PROXY,
+    PREDICTION_MEDIA_PROXY_OVERSAMPLE,
+    PREDICTION_MEDIA_PROXY_FORMAT,
+    PREDICTION_HEDGED_FETCH,
+    PREDICTION_HEDGE_PERCENTILE,
+    PREDICTION_HEDGE_BUDGET,
+    PREDICTION_HEDGE_DEFAULT_DELAY,
+)
 
-# GitHub raw content URLs for models
+# Model files are fetched from MODEL_REPO_BASE (GitHub raw by default, see config)
 GITHUB_TOKEN = os.getenv("GITHUB_TOKEN")
-MODEL_REPO_BASE = "https://raw.githubusercontent.com/teamrocket43434/jessmodel/main"
-
-PRIMARY_ONNX_URL = f"{MODEL_REPO_BASE}/pokemon_cnn_v2.onnx"
-PRIMARY_LABELS_URL = f"{MODEL_REPO_BASE}/labels_v2.json"
-SECONDARY_ONNX_URL = f"{MODEL_REPO_BASE}/poketwo_pokemon_model.onnx"
-SECONDARY_ONNX_DATA_URL = f"{MODEL_REPO_BASE}/poketwo_pokemon_model.onnx.data"
-SECONDARY_METADATA_URL = f"{MODEL_REPO_BASE}/model_metadata.json"
+# Expected sizes/SHA-256 published next to the models (python model_tools.py manifest)
+MODEL_MANIFEST_NAME = "manifest.json"
 
 CACHE_DIR = os.path.join(os.path.dirname(os.path.realpath(__file__)), "model_cache")
 PRIMARY_ONNX_PATH = os.path.join(CACHE_DIR, "pokemon_cnn_v2.onnx")
@@ -27,216 +85,862 @@ PRIMARY_LABELS_PATH = os.path.join(CACHE_DIR, "labels_v2.json")
 SECONDARY_ONNX_PATH = os.path.join(CACHE_DIR, "poketwo_pokemon_model.onnx")
 SECONDARY_ONNX_DATA_PATH = os.path.join(CACHE_DIR, "poketwo_pokemon_model.onnx.data")
 SECONDARY_METADATA_PATH = os.path.join(CACHE_DIR, "model_metadata.json")
+PREDICTION_DB_PATH = os.path.join(CACHE_DIR, "predictions.sqlite3")
 
 
-class PredictionCache:
-    """Ultra-lightweight cache - ONLY stores final results"""
-    def __init__(self, max_size=200, ttl_seconds=900):  # REDUCED: 200 items, 15min TTL
-        self.cache = {}
-        self.timestamps = {}
-        self.max_size = max_size
-        self.ttl_seconds = ttl_seconds
-        self._cleanup_counter = 0
-
-    def _cleanup_expired(self):
-        """Remove expired entries - aggressive cleanup"""
-        current_time = time.time()
-        expired_keys = [
-            key for key, timestamp in self.timestamps.items()
-            if current_time - timestamp > self.ttl_seconds
-        ]
-        for key in expired_keys:
-            self.cache.pop(key, None)
-            self.timestamps.pop(key, None)
-        
-        # Force GC every 20 cleanups
-        self._cleanup_counter += 1
-        if self._cleanup_counter >= 20:
-            gc.collect()
-            self._cleanup_counter = 0
-
-    def get(self, key: str) -> Optional[Tuple[str, str, str]]:
-        """Get cached prediction if valid"""
-        self._cleanup_expired()
-        if key in self.cache:
-            current_time = time.time()
-            if current_time - self.timestamps[key] <= self.ttl_seconds:
-                return self.cache[key]
-            else:
-                self.cache.pop(key, None)
-                self.timestamps.pop(key, None)
-        return None
+def model_file_paths() -> list:
+    """Every file the models need, in the model cache"""
+    return [PRIMARY_ONNX_PATH, PRIMARY_LABELS_PATH, SECONDARY_ONNX_PATH,
+            SECONDARY_ONNX_DATA_PATH, SECONDARY_METADATA_PATH]
+
+
+def load_primary_class_names(path: str = None) -> list:
+    """Load the primary model's class names from labels_v2.json"""
+    with open(path or PRIMARY_LABELS_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        sorted_keys = sorted(data.keys(), key=lambda x: int(x))
+        return [data[k].strip('"') for k in sorted_keys]
+    if isinstance(data, list):
+        return [name.strip('"') for name in data]
+    raise ValueError("labels_v2.json must be a list or dict")
+
+
+def resample_filter(name: Optional[str]) -> int:
+    """PIL filter for a PREDICTION_RESAMPLE name (LANCZOS, the reference, if unset or unknown)"""
+    if name is None:
+        return Image.LANCZOS
+    if name.lower() not in RESAMPLE_FILTERS:
+        print(f"⚠️ Unknown resample filter {name!r}, using lanczos")
+        return Image.LANCZOS
+    return RESAMPLE_FILTERS[name.lower()]
+
+
+def load_secondary_metadata(path: str = None) -> dict:
+    """Load the secondary model's metadata (class names and input size)"""
+    with open(path or SECONDARY_METADATA_PATH, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class ModelsNotReady(Exception):
+    """The models are still loading (or failed to load) and the request can't wait for them"""
+
+
+class ImageUnavailable(ValueError):
+    """The image is permanently unusable (deleted/expired, forbidden, empty or undecodable)"""
+
+
+class DeadlineExceeded(Exception):
+    """A prediction ran out of time before it had any answer to return"""
+
+
+def time_left(deadline: Optional[float]) -> float:
+    """Seconds until an absolute time.monotonic() deadline (infinite when there is none)"""
+    return float("inf") if deadline is None else deadline - time.monotonic()
+
+
+class PredictionResult(NamedTuple):
+    """Structured prediction output (formatting is left to the presentation layer)"""
+    class_index: int
+    name: str
+    probability: float                              # 0.0 - 1.0
+    model_used: str                                 # "primary", "secondary", "primary_fallback" or "primary_deadline"
+    top_k: Tuple[Tuple[str, float], ...] = ()       # (name, probability) alternatives, best first
+    timings: Optional[Dict[str, float]] = None      # Per-stage milliseconds (fetch, decode, primary, secondary)
+    cached: bool = False                            # Served from a cache tier, no inference ran
+
+    @property
+    def confidence_pct(self) -> float:
+        return self.probability * 100
+
+    def to_dict(self) -> dict:
+        """JSON-serializable form (for the disk cache)"""
+        data = self._asdict()
+        data.pop("cached")
+        return data
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "PredictionResult":
+        data = dict(data)
+        data["top_k"] = tuple((name, prob) for name, prob in data.get("top_k", ()))
+        return cls(**data)
+
+
+class PredictionCache(LRUCache):
+    """Prediction result cache - ONLY stores final results"""
+    def __init__(self, max_size=PREDICTION_CACHE_SIZE, ttl_seconds=PREDICTION_CACHE_TTL):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+
+
+class BatchScheduler:
+    """Micro-batches concurrent inference requests for one ONNX session
+
+    Requests arriving within the batching window (or until max_batch_size
+    images are queued) are stacked into one tensor and run with a single
+    session.run call. Each caller gets back its own softmax probability row.
+    Inference runs on the given executor so the event loop never blocks.
+    Sessions with a uint8 input take raw (1, H, W, 3) pixels instead of a
+    normalized (1, 3, H, W) float tensor - see uint8_input.
+
+    Inference uses IO binding over pooled, preallocated input and output
+    buffers (one set per batch shape and concurrent worker), so steady-state
+    batches only allocate the small probability copy handed back to callers.
+    """
+    def __init__(self, session: ort.InferenceSession, executor: Optional[ThreadPoolExecutor] = None,
+                 window_ms=PREDICTION_BATCH_WINDOW_MS, max_batch_size=PREDICTION_MAX_BATCH_SIZE):
+        self.session = session
+        self.executor = executor
+        # Resolved once - session.get_inputs()/get_outputs() are not free
+        model_input = session.get_inputs()[0]
+        model_output = session.get_outputs()[0]
+        self.input_name = model_input.name
+        self.output_name = model_output.name
+        self.uint8_input = model_input.type == "tensor(uint8)"
+        self.input_dtype = np.uint8 if self.uint8_input else np.float32
+        num_classes = model_output.shape[-1]
+        self.num_classes = num_classes if isinstance(num_classes, int) and num_classes > 0 else None
+        self.window_seconds = window_ms / 1000
+        self.max_batch_size = max_batch_size
+
+        # Models exported with a fixed batch dimension can only run one image at a time
+        batch_dim = session.get_inputs()[0].shape[0]
+        if isinstance(batch_dim, int) and batch_dim > 0:
+            self.max_batch_size = min(self.max_batch_size, batch_dim)
+
+        self._pending = []
+        self._flush_handle = None
+        # (batch size, image shape) -> free (io_binding, input buffer, output buffer) slots
+        self._buffer_pool = {}
+        self._buffer_lock = threading.Lock()
+        self.batches_run = 0
+        self.images_run = 0
+        self.buffers_allocated = 0
+
+    async def submit(self, image: np.ndarray) -> np.ndarray:
+        """Queue a single-image tensor and wait for its probability row"""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((image, future))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            self._flush_handle = loop.call_later(self.window_seconds, self._flush)
+
+        return await future
+
+    def _flush(self):
+        """Hand the queued requests to a batch task"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
 
-    def set(self, key: str, value: Tuple[str, str, str]):
-        """Cache a prediction - ONLY the result tuple"""
-        self._cleanup_expired()
+        while self._pending:
+            batch = self._pending[:self.max_batch_size]
+            self._pending = self._pending[self.max_batch_size:]
+            asyncio.ensure_future(self._run_batch(batch))
 
-        if len(self.cache) >= self.max_size:
-            # Remove 20% of oldest entries when full
-            sorted_keys = sorted(self.timestamps.items(), key=lambda x: x[1])
-            remove_count = max(1, self.max_size // 5)
-            for old_key, _ in sorted_keys[:remove_count]:
-                self.cache.pop(old_key, None)
-                self.timestamps.pop(old_key, None)
-            gc.collect()  # Force GC after bulk removal
+    async def _run_batch(self, batch: list):
+        """Run one batched inference and resolve every caller's future"""
+        # Callers that gave up while waiting don't need a slot in the batch
+        batch = [(image, future) for image, future in batch if not future.done()]
+        if not batch:
+            return
+
+        try:
+            loop = asyncio.get_running_loop()
+            probabilities = await loop.run_in_executor(
+                self.executor, self._infer, [image for image, _ in batch]
+            )
+            self.batches_run += 1
+            self.images_run += len(batch)
+
+            for row, (_, future) in enumerate(batch):
+                if not future.done():
+                    future.set_result(probabilities[row])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+    def _infer(self, images: list) -> np.ndarray:
+        """Copy images into a pooled buffer and run the bound session (executes in a worker thread)"""
+        shape = (len(images),) + images[0].shape[1:]
+        slot = self._acquire_buffers(shape)
+        binding, input_buffer, output_buffer = slot
+        try:
+            for row, image in enumerate(images):
+                input_buffer[row] = image[0]
+            self.session.run_with_iobinding(binding)
+
+            if output_buffer is None:
+                # Class count unknown until run time - ONNX Runtime allocates the output
+                return softmax(binding.copy_outputs_to_cpu()[0])
+            softmax_inplace(output_buffer)
+            # The buffer goes back to the pool, callers get their own rows
+            return output_buffer.copy()
+        finally:
+            self._release_buffers(shape, slot)
+
+    def warm_up(self, width: int, height: int) -> float:
+        """Run a synthetic batch of every size through the session (worker thread), returning seconds taken
+
+        Triggers ONNX Runtime's lazy allocations and fills the IO binding
+        buffer pool, so the first real batch of any size runs at steady-state speed.
+        """
+        started = time.perf_counter()
+        shape = (height, width, 3) if self.uint8_input else (3, height, width)
+        image = np.zeros((1,) + shape, dtype=self.input_dtype)
+        for batch_size in range(1, self.max_batch_size + 1):
+            self._infer([image] * batch_size)
+        return time.perf_counter() - started
+
+    def _acquire_buffers(self, shape: tuple) -> tuple:
+        """Take a free buffer set for this batch shape, allocating one the first time it is needed"""
+        with self._buffer_lock:
+            free = self._buffer_pool.setdefault(shape, [])
+            if free:
+                return free.pop()
+            self.buffers_allocated += 1
+
+        input_buffer = np.empty(shape, dtype=self.input_dtype)
+        binding = self.session.io_binding()
+        binding.bind_ortvalue_input(self.input_name, ort.OrtValue.ortvalue_from_numpy(input_buffer))
+        output_buffer = None
+        if self.num_classes is not None:
+            output_buffer = np.empty((shape[0], self.num_classes), dtype=np.float32)
+            binding.bind_ortvalue_output(self.output_name, ort.OrtValue.ortvalue_from_numpy(output_buffer))
+        else:
+            binding.bind_output(self.output_name, "cpu")
+        return binding, input_buffer, output_buffer
+
+    def _release_buffers(self, shape: tuple, slot: tuple):
+        with self._buffer_lock:
+            self._buffer_pool[shape].append(slot)
+
+
+def softmax(x: np.ndarray) -> np.ndarray:
+    """Vectorized softmax over the class axis (works for single rows and batches)"""
+    exp_x = np.exp(x - np.max(x, axis=-1, keepdims=True))
+    return exp_x / np.sum(exp_x, axis=-1, keepdims=True)
 
-        self.cache[key] = value
-        self.timestamps[key] = time.time()
+
+def softmax_inplace(x: np.ndarray) -> np.ndarray:
+    """Softmax over the class axis, overwriting x (float32 output buffers)"""
+    x -= np.max(x, axis=-1, keepdims=True)
+    np.exp(x, out=x)
+    x /= np.sum(x, axis=-1, keepdims=True)
+    return x
 
 
 class ModelDownloader:
-    """Handle downloading and caching models from GitHub"""
-    
+    """Download and verify model files from MODEL_REPO_BASE into the model cache
+
+    Files are streamed in chunks to <name>.part and renamed into place only
+    after their size and SHA-256 check out, so a crash mid-download never
+    leaves a file that looks cached. Interrupted downloads resume with HTTP
+    Range requests, and large files are fetched as parallel byte ranges.
+
+    Expected sizes and hashes come from the manifest.json published next to
+    the models. Files it doesn't cover are pinned in model_cache/manifest.json
+    on first download and verified against that on every later start.
+    """
+    CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self, session: aiohttp.ClientSession, base_url: str = None, cache_dir: str = None):
+        self.session = session
+        self.base_url = (base_url or MODEL_REPO_BASE).rstrip("/")
+        self.cache_dir = cache_dir or CACHE_DIR
+        self.manifest_path = os.path.join(self.cache_dir, MODEL_MANIFEST_NAME)
+        self.parallel_min_bytes = MODEL_DOWNLOAD_PARALLEL_MIN_MB * 1024 * 1024
+        self.parallel_chunks = MODEL_DOWNLOAD_PARALLEL_CHUNKS
+
+    def _headers(self) -> dict:
+        headers = {}
+        if GITHUB_TOKEN:
+            headers['Authorization'] = f'token {GITHUB_TOKEN}'
+        return headers
+
+    async def ensure_models_cached(self, paths: list = None):
+        """Download every missing or unverifiable model file"""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        if paths is None:
+            paths = model_file_paths()
+
+        published = await self._fetch_published_manifest()
+        pinned = self._load_pinned_manifest()
+        results = await asyncio.gather(*(
+            self._ensure_file(path, published.get(os.path.basename(path)), pinned) for path in paths
+        ))
+        self._save_pinned_manifest(pinned)
+
+        if not all(results):
+            raise Exception("Failed to download some model files")
+
+    async def _ensure_file(self, path: str, expected: Optional[dict], pinned: dict) -> bool:
+        """Verify a cached file (re-downloading it if needed) and pin its size/hash"""
+        name = os.path.basename(path)
+        url = f"{self.base_url}/{name}"
+        loop = asyncio.get_running_loop()
+
+        if os.path.exists(path):
+            reference = expected or pinned.get(name)
+            if reference is None:
+                # Cached before manifests existed - only the server's size can vouch for it
+                size, _ = await self._probe(url)
+                reference = {"size": size} if size else {}
+            entry = await loop.run_in_executor(None, self._verify_cached, path, reference)
+            if entry:
+                pinned[name] = entry
+                print(f"✓ Cached: {name}")
+                return True
+            print(f"⚠️ Cached {name} failed verification, downloading again")
+            os.remove(path)
+
+        print(f"Downloading {name}...")
+        entry = await self.download_file(url, path, expected)
+        if entry is None:
+            return False
+        pinned[name] = entry
+        return True
+
     @staticmethod
-    async def download_file(url: str, dest_path: str, session: aiohttp.ClientSession):
-        """Download a file from URL to destination path"""
+    def _verify_cached(path: str, reference: dict) -> Optional[dict]:
+        """Manifest entry for a cached file, or None if it doesn't match the reference"""
+        size = os.path.getsize(path)
+        if reference.get("size") and size != reference["size"]:
+            return None
+        sha256 = file_sha256(path)
+        if reference.get("sha256") and sha256 != reference["sha256"]:
+            return None
+        return {"size": size, "sha256": sha256}
+
+    async def download_file(self, url: str, dest_path: str, expected: Optional[dict] = None) -> Optional[dict]:
+        """Stream a file into place, returning its manifest entry (None on failure)"""
+        part_path = dest_path + ".part"
+        loop = asyncio.get_running_loop()
         try:
-            timeout = aiohttp.ClientTimeout(total=60, connect=10)
-            
-            headers = {}
-            if GITHUB_TOKEN:
-                headers['Authorization'] = f'token {GITHUB_TOKEN}'
-            
-            async with session.get(url, timeout=timeout, headers=headers) as response:
-                if response.status == 401:
-                    raise ValueError(f"Authentication failed. Check your GITHUB_TOKEN environment variable.")
-                if response.status == 404:
-                    raise ValueError(f"File not found: {url}. Check repository name and file path.")
-                if response.status != 200:
-                    raise ValueError(f"HTTP {response.status} error downloading {url}")
-                
-                content = await response.read()
-                
-                os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-                
-                with open(dest_path, 'wb') as f:
-                    f.write(content)
-                
-                print(f"✅ Downloaded: {os.path.basename(dest_path)}")
-                return True
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            total, accepts_ranges = await self._probe(url)
+            if expected and expected.get("size"):
+                total = total or expected["size"]
+
+            if os.path.exists(part_path) and total and os.path.getsize(part_path) == total:
+                pass  # Fully downloaded before a crash, only verification is left
+            elif total and accepts_ranges and total >= self.parallel_min_bytes:
+                await self._fetch_parallel(url, part_path, total)
+            else:
+                await self._fetch_into(url, part_path)
+
+            size = os.path.getsize(part_path)
+            sha256 = await loop.run_in_executor(None, hash_file, part_path)
+            problem = None
+            if total and size != total:
+                problem = f"size {size} != {total}"
+            elif expected and expected.get("sha256") and sha256 != expected["sha256"]:
+                problem = "SHA-256 mismatch"
+            if problem:
+                # A corrupt .part can't be resumed - start from scratch next time
+                os.remove(part_path)
+                raise ValueError(f"Downloaded file failed verification ({problem})")
+
+            os.replace(part_path, dest_path)
+            remember_sha256(dest_path, sha256)
+            print(f"✅ Downloaded: {os.path.basename(dest_path)} ({size / 1024 / 1024:.1f} MB)")
+            return {"size": size, "sha256": sha256}
         except Exception as e:
             print(f"❌ Failed to download {url}: {e}")
-            return False
-    
-    @staticmethod
-    async def ensure_models_cached(session: aiohttp.ClientSession):
-        """Download all required models if not cached"""
-        os.makedirs(CACHE_DIR, exist_ok=True)
-        
-        downloads = [
-            (PRIMARY_ONNX_URL, PRIMARY_ONNX_PATH),
-            (PRIMARY_LABELS_URL, PRIMARY_LABELS_PATH),
-            (SECONDARY_ONNX_URL, SECONDARY_ONNX_PATH),
-            (SECONDARY_ONNX_DATA_URL, SECONDARY_ONNX_DATA_PATH),
-            (SECONDARY_METADATA_URL, SECONDARY_METADATA_PATH),
-        ]
-        
-        download_tasks = []
-        for url, path in downloads:
-            if not os.path.exists(path):
-                print(f"Downloading {os.path.basename(path)}...")
-                download_tasks.append(ModelDownloader.download_file(url, path, session))
+            return None
+
+    async def _probe(self, url: str) -> Tuple[Optional[int], bool]:
+        """(size, supports Range requests) from a HEAD request, (None, False) if unknown"""
+        try:
+            timeout = aiohttp.ClientTimeout(total=15, connect=10)
+            async with self.session.head(url, timeout=timeout, headers=self._headers(),
+                                         allow_redirects=True) as response:
+                if response.status != 200:
+                    return None, False
+                size = response.headers.get('Content-Length')
+                # Content-Length of a compressed response isn't the file size
+                if response.headers.get('Content-Encoding', 'identity') != 'identity':
+                    size = None
+                return (int(size) if size else None), response.headers.get('Accept-Ranges') == 'bytes'
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return None, False
+
+    async def _fetch_into(self, url: str, path: str, start: int = 0, end: Optional[int] = None):
+        """Stream url (or bytes start..end) into path, resuming from what path already holds"""
+        have = os.path.getsize(path) if os.path.exists(path) else 0
+        if end is not None and have >= end - start + 1:
+            return
+
+        headers = self._headers()
+        offset = start + have
+        if offset or end is not None:
+            headers['Range'] = f"bytes={offset}-{'' if end is None else end}"
+
+        # No total timeout: a large file may legitimately take minutes, a stalled one may not
+        timeout = aiohttp.ClientTimeout(total=None, connect=10, sock_read=60)
+        async with self.session.get(url, timeout=timeout, headers=headers) as response:
+            if response.status == 401:
+                raise ValueError(f"Authentication failed. Check your GITHUB_TOKEN environment variable.")
+            if response.status == 404:
+                raise ValueError(f"File not found: {url}. Check repository name and file path.")
+            if response.status == 416 and end is None and have:
+                return  # Nothing left past what we already have
+            if response.status == 206:
+                mode = 'ab'
+            elif response.status == 200 and start == 0:
+                mode = 'wb'  # Server ignored the Range header - start over
             else:
-                print(f"✓ Cached: {os.path.basename(path)}")
-        
-        if download_tasks:
-            results = await asyncio.gather(*download_tasks)
-            if not all(results):
-                raise Exception("Failed to download some model files")
+                raise ValueError(f"HTTP {response.status} error downloading {url}")
+
+            loop = asyncio.get_running_loop()
+            with open(path, mode) as f:
+                async for chunk in response.content.iter_chunked(self.CHUNK_SIZE):
+                    await loop.run_in_executor(None, f.write, chunk)
+
+    async def _fetch_parallel(self, url: str, part_path: str, total: int):
+        """Fetch a large file as resumable byte ranges, then join them into part_path"""
+        step = -(-total // self.parallel_chunks)
+        pieces = [
+            (f"{part_path}{i}", start, min(start + step, total) - 1)
+            for i, start in enumerate(range(0, total, step))
+        ]
+        await asyncio.gather(*(self._fetch_into(url, path, start, end) for path, start, end in pieces))
+
+        for path, start, end in pieces:
+            if os.path.getsize(path) != end - start + 1:
+                raise ValueError(f"Incomplete byte range {start}-{end}")
+
+        def _join():
+            with open(part_path, 'wb') as out:
+                for path, _, _ in pieces:
+                    with open(path, 'rb') as piece:
+                        shutil.copyfileobj(piece, out, self.CHUNK_SIZE)
+            for path, _, _ in pieces:
+                os.remove(path)
+
+        await asyncio.get_running_loop().run_in_executor(None, _join)
+
+    async def _fetch_published_manifest(self) -> dict:
+        """Expected sizes/hashes published next to the models ({} if there is none)"""
+        try:
+            timeout = aiohttp.ClientTimeout(total=15, connect=10)
+            async with self.session.get(f"{self.base_url}/{MODEL_MANIFEST_NAME}", timeout=timeout,
+                                        headers=self._headers()) as response:
+                if response.status != 200:
+                    return {}
+                manifest = json.loads(await response.read())
+                return manifest if isinstance(manifest, dict) else {}
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+            return {}
+
+    def _load_pinned_manifest(self) -> dict:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            return manifest if isinstance(manifest, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_pinned_manifest(self, manifest: dict):
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.manifest_path)
 
 
 class Prediction:
     def __init__(self):
         self.cache = PredictionCache()
+        # Optional second tier keyed by image bytes (same image under different URLs)
+        self.content_cache = PredictionCache() if PREDICTION_CONTENT_CACHE else None
+        # Persistent tier - opens in the background, misses until it is ready
+        self.disk_cache = None
+        if PREDICTION_DISK_CACHE:
+            self.disk_cache = DiskCache(
+                PREDICTION_DB_PATH,
+                max_entries=PREDICTION_DISK_CACHE_SIZE,
+                ttl_seconds=PREDICTION_DISK_CACHE_TTL
+            )
+            self.disk_cache.start()
+        # Exact URLs known to be dead or unsupported, so replays skip the whole retry chain
+        self.negative_cache = LRUCache(max_size=PREDICTION_NEGATIVE_CACHE_SIZE,
+                                       ttl_seconds=PREDICTION_NEGATIVE_CACHE_TTL)
+        self.negative_seconds_saved = 0.0
+        # Concurrent requests for the same image share one download and inference
+        self._inflight = SingleFlight()
         self.primary_session = None
         self.secondary_session = None
+        self.primary_scheduler = None
+        self.secondary_scheduler = None
         self.primary_class_names = None
         self.secondary_class_names = None
         self.secondary_metadata = None
+        self.primary_labels = []
+        self.secondary_labels = []
+        # Pokedex join for label_for - ready before any cache hit can be served (models load later)
+        self._name_index = build_pokemon_name_index(load_pokemon_data())
+        self._cdn_mapping = load_cdn_mapping()
         self.models_initialized = False
-        self._cdn_semaphore = asyncio.Semaphore(3)
-        self._last_cdn_request = 0
-        self._cdn_min_interval = 0.1
-        self._prediction_counter = 0
+        # Background model loading, and requests held until it finishes (bounded)
+        self._init_task = None
+        self._pre_ready_waiting = 0
+        self.load_error = None
+        self.deferred_predictions = 0
+        # Deadline-aware scheduling: secondary stage cost estimates (seconds, refined as we go) and counters
+        self._secondary_stage_seconds = 0.25
+        self._secondary_load_seconds = 5.0
+        self.deadline_counters = {
+            "requests": 0,           # Predictions that came with a deadline
+            "met": 0,
+            "missed": 0,             # Finished late, or gave up with DeadlineExceeded
+            "retries_abandoned": 0,  # Fetch retries skipped because they couldn't finish in time
+            "secondary_skipped": 0,  # Secondary stage not started, not enough time left
+            "secondary_cut": 0,      # Secondary stage started but cut off at the deadline
+        }
+        # Per-host adaptive token buckets for Discord CDN fetches (shared 429 cool-down)
+        self.cdn_limiter = HostRateLimiter(
+            rate=CDN_RATE_LIMIT_INITIAL,
+            burst=CDN_RATE_LIMIT_BURST,
+            min_rate=CDN_RATE_LIMIT_MIN,
+            max_rate=CDN_RATE_LIMIT_MAX,
+            increase=CDN_RATE_LIMIT_INCREASE
+        )
+        # Preprocessing settings (see `python model_tools.py benchmark-preprocess`)
+        self.primary_resample = resample_filter(PREDICTION_RESAMPLE.get("primary"))
+        self.secondary_resample = resample_filter(PREDICTION_RESAMPLE.get("secondary"))
+        # Downscaled attachment renditions from the media proxy (original URL on failure)
+        self.media_proxy_counters = {"fetched": 0, "fallbacks": 0, "bytes": 0}
+        # Optional hedged image fetches (second request for the slow tail, budget-capped)
+        self.hedge_policy = None
+        if PREDICTION_HEDGED_FETCH:
+            self.hedge_policy = HedgePolicy(
+                percentile=PREDICTION_HEDGE_PERCENTILE,
+                budget=PREDICTION_HEDGE_BUDGET,
+                default_delay=PREDICTION_HEDGE_DEFAULT_DELAY
+            )
+        # Low-memory mode: lazily loaded secondary model, unloaded once idle
+        self._secondary_load_task = None
+        self._secondary_idle_task = None
+        self._secondary_last_used = 0.0
+        # Bounded pool for CPU work (decode, resize, normalize, inference)
+        self._executor = ThreadPoolExecutor(max_workers=PREDICTION_WORKERS, thread_name_prefix="predict")
+
+    @property
+    def state(self) -> str:
+        """Model readiness - "idle", "loading", "ready" or "failed" (see load_error)"""
+        if self.models_initialized:
+            return "ready"
+        if self._init_task is not None and not self._init_task.done():
+            return "loading"
+        return "failed" if self.load_error is not None else "idle"
+
+    def start_loading(self, session: aiohttp.ClientSession) -> asyncio.Task:
+        """Start loading the models in the background (no-op while loading or ready, retries after a failure)"""
+        if self._init_task is None or (self._init_task.done() and not self.models_initialized):
+            self.load_error = None
+            self._init_task = asyncio.create_task(self._load_models(session))
+        return self._init_task
 
     async def initialize_models(self, session: aiohttp.ClientSession):
         """Download and initialize both models - ONLY ONCE"""
         if self.models_initialized:
             print("[INIT] Models already initialized, skipping...")
             return
-        
+
+        await asyncio.shield(self.start_loading(session))
+        if not self.models_initialized:
+            raise self.load_error or ModelsNotReady("Models failed to load")
+
+    async def _load_models(self, session: aiohttp.ClientSession):
+        """Download and initialize both models, logging how long each stage took"""
         print("Initializing prediction models...")
-        
-        await ModelDownloader.ensure_models_cached(session)
-        
-        # Load class names
-        with open(PRIMARY_LABELS_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if isinstance(data, dict):
-                sorted_keys = sorted(data.keys(), key=lambda x: int(x))
-                self.primary_class_names = [data[k].strip('"') for k in sorted_keys]
-            elif isinstance(data, list):
-                self.primary_class_names = [name.strip('"') for name in data]
-            else:
-                raise ValueError("labels_v2.json must be a list or dict")
-        
-        with open(SECONDARY_METADATA_PATH, "r", encoding="utf-8") as f:
-            self.secondary_metadata = json.load(f)
+        started = stage_start = time.perf_counter()
+        stages = {}
+
+        def end_stage(name: str):
+            nonlocal stage_start
+            now = time.perf_counter()
+            stages[name] = now - stage_start
+            stage_start = now
+
+        try:
+            await ModelDownloader(session).ensure_models_cached()
+            end_stage("download")
+            
+            # Load class names
+            self.primary_class_names = load_primary_class_names()
+            self.secondary_metadata = load_secondary_metadata()
             self.secondary_class_names = self.secondary_metadata["class_names"]
-        
-        # CRITICAL: Ultra-minimal ONNX session options
-        sess_opts = ort.SessionOptions()
-        sess_opts.intra_op_num_threads = 1  # REDUCED to 1 thread
-        sess_opts.inter_op_num_threads = 1
-        sess_opts.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
-        sess_opts.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_BASIC  # REDUCED optimization
-        sess_opts.enable_mem_pattern = False
-        sess_opts.enable_cpu_mem_arena = False
-        providers = ["CPUExecutionProvider"]
-        
-        # Initialize models
-        self.primary_session = ort.InferenceSession(
-            PRIMARY_ONNX_PATH,
-            sess_options=sess_opts,
-            providers=providers
-        )
-        print(f"✅ Primary model initialized: {len(self.primary_class_names)} classes")
-        
-        self.secondary_session = ort.InferenceSession(
-            SECONDARY_ONNX_PATH,
-            sess_options=sess_opts,
-            providers=providers
-        )
-        print(f"✅ Secondary model initialized: {len(self.secondary_class_names)} classes")
-        
+
+            # Join both label sets to the Pokedex once, so everything after argmax is an O(1) index
+            self.primary_labels = [build_label_info(name, self._name_index, self._cdn_mapping)
+                                   for name in self.primary_class_names]
+            self.secondary_labels = [build_label_info(name, self._name_index, self._cdn_mapping)
+                                     for name in self.secondary_class_names]
+            end_stage("labels")
+            
+            # Initialize models (graph preparation and session creation run in the worker pool)
+            loop = asyncio.get_running_loop()
+            self.primary_session = await loop.run_in_executor(
+                self._executor, self._create_session, PRIMARY_ONNX_PATH
+            )
+            print(f"✅ Primary model initialized: {len(self.primary_class_names)} classes")
+            primary_scheduler = BatchScheduler(self.primary_session, self._executor)
+            if PREDICTION_WARMUP:
+                warmup_seconds = await loop.run_in_executor(self._executor, primary_scheduler.warm_up, 224, 224)
+                print(f"🔥 Primary warm-up (batch sizes 1-{primary_scheduler.max_batch_size}): {warmup_seconds:.2f}s")
+            self.primary_scheduler = primary_scheduler
+            end_stage("primary")
+
+            if PREDICTION_LOW_MEMORY_MODE:
+                # Secondary is loaded on first fallback and unloaded again when idle
+                print(f"💤 Secondary model deferred (low-memory mode): {len(self.secondary_class_names)} classes")
+            else:
+                await loop.run_in_executor(self._executor, self._load_secondary)
+                end_stage("secondary")
+
+            if PREDICTION_WARMUP:
+                await self._warm_up_io(session)
+                end_stage("warmup")
+        except Exception as e:
+            self.load_error = e
+            print(f"❌ Model loading failed: {e}")
+            return
+
         self.models_initialized = True
         
         # Force garbage collection after model loading
         gc.collect()
+        breakdown = ", ".join(f"{name} {seconds:.2f}s" for name, seconds in stages.items())
+        print(f"[STARTUP] Models ready in {time.perf_counter() - started:.2f}s ({breakdown})")
+
+    async def _wait_for_models(self, session: aiohttp.ClientSession, deadline: Optional[float] = None):
+        """Hold a request that arrived before the models were ready (bounded backlog and wait)"""
+        if self._pre_ready_waiting >= PREDICTION_PRE_READY_BACKLOG:
+            self.deferred_predictions += 1
+            raise ModelsNotReady("Models are still loading and the startup backlog is full")
+
+        self._pre_ready_waiting += 1
+        try:
+            wait_seconds = max(0.0, min(PREDICTION_PRE_READY_WAIT, time_left(deadline)))
+            await asyncio.wait_for(asyncio.shield(self.start_loading(session)), wait_seconds)
+        except asyncio.TimeoutError:
+            self.deferred_predictions += 1
+            raise ModelsNotReady("Models are still loading")
+        finally:
+            self._pre_ready_waiting -= 1
+
+        if not self.models_initialized:
+            raise ModelsNotReady(f"Models failed to load: {self.load_error}")
+
+    @staticmethod
+    def _create_session(model_path: str) -> ort.InferenceSession:
+        """Create an ONNX session from the INT8 / uint8-input variants (if enabled) and the cached pre-optimized graph"""
+        if PREDICTION_QUANTIZED_MODE:
+            model_path = prepare_quantized_model(model_path, CACHE_DIR, PREDICTION_QUANTIZED_MODE)
+        if PREDICTION_UINT8_INPUT:
+            model_path = prepare_uint8_input_model(model_path, CACHE_DIR)
+        prepared_path = prepare_optimized_model(model_path, CACHE_DIR, MODEL_GRAPH_OPTIMIZATION)
+        # A prepared graph is already optimized - skip graph optimization at load time
+        level = "none" if prepared_path != model_path else "basic"
+        return create_session(prepared_path, level=level)
+
+    def _load_secondary(self):
+        """Create (and warm up) the secondary session and its batch scheduler"""
+        started = time.perf_counter()
+        secondary_session = self._create_session(SECONDARY_ONNX_PATH)
+        secondary_scheduler = BatchScheduler(secondary_session, self._executor)
+        print(f"✅ Secondary model initialized: {len(self.secondary_class_names)} classes")
+        if PREDICTION_WARMUP:
+            warmup_seconds = secondary_scheduler.warm_up(
+                self.secondary_metadata["image_width"], self.secondary_metadata["image_height"]
+            )
+            print(f"🔥 Secondary warm-up (batch sizes 1-{secondary_scheduler.max_batch_size}): {warmup_seconds:.2f}s")
+        # Published only once warm, so no spawn ever pays for the first run
+        self.secondary_session = secondary_session
+        self.secondary_scheduler = secondary_scheduler
+        self._secondary_last_used = time.monotonic()
+        self._secondary_load_seconds = time.perf_counter() - started
+
+    async def _warm_up_io(self, session: aiohttp.ClientSession):
+        """Warm the image decoders/resizers and pre-open keep-alive connections to the Discord CDN"""
+        started = time.perf_counter()
+        loop = asyncio.get_running_loop()
+        image_sizes = [(224, 224, self.primary_resample),
+                       (self.secondary_metadata["image_width"], self.secondary_metadata["image_height"],
+                        self.secondary_resample)]
+        await loop.run_in_executor(self._executor, self._warm_up_images, image_sizes)
+        images_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        opened = await self._preopen_cdn_connections(session)
+        cdn_seconds = time.perf_counter() - started
+        print(f"🔥 I/O warm-up: image pipeline {images_seconds:.2f}s, "
+              f"{opened} CDN connections {cdn_seconds:.2f}s")
+
+    @staticmethod
+    def _warm_up_images(sizes: list):
+        """Decode and resize synthetic PNG/JPEG images once (loads PIL plugins and resampling code)"""
+        source = Image.new("RGB", (64, 64), (128, 128, 128))
+        for image_format in ("PNG", "JPEG"):
+            buffer = io.BytesIO()
+            source.save(buffer, image_format)
+            img = Prediction._decode_image(buffer.getvalue())
+            for width, height, resample in sizes:
+                Prediction._rgb_image_to_uint8(img, width, height, resample)
+                Prediction._rgb_image_to_tensor(img, width, height, resample)
+            img.close()
+        source.close()
+
+    async def _preopen_cdn_connections(self, session: aiohttp.ClientSession) -> int:
+        """Open keep-alive connections (DNS + TLS) to each CDN host, returning how many succeeded"""
+        timeout = aiohttp.ClientTimeout(total=5, connect=3)
+
+        async def touch(host: str) -> bool:
+            try:
+                async with session.head(f"https://{host}/", timeout=timeout, allow_redirects=False):
+                    return True
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                return False
+
+        results = await asyncio.gather(*(
+            touch(host) for host in sorted(DISCORD_CDN_HOSTS)
+            for _ in range(PREDICTION_WARMUP_CDN_CONNECTIONS)
+        ))
+        return sum(results)
+
+    @property
+    def secondary_loaded(self) -> bool:
+        return self.secondary_scheduler is not None
+
+    async def _get_secondary_scheduler(self) -> BatchScheduler:
+        """Get the secondary scheduler, loading the model off the event loop if needed
+
+        Every caller awaits the same load task through a shield, so a caller
+        cut off by its deadline never abandons a half-finished load (or
+        causes a second copy of the model to be loaded next time).
+        """
+        if self.secondary_scheduler is None:
+            if self._secondary_load_task is None or self._secondary_load_task.done():
+                self._secondary_load_task = asyncio.create_task(self._load_secondary_in_background())
+            await asyncio.shield(self._secondary_load_task)
+
+        self._secondary_last_used = time.monotonic()
+        return self.secondary_scheduler
+
+    async def _load_secondary_in_background(self):
+        """Load the secondary model in the worker pool and start its idle watcher once it is published"""
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._executor, self._load_secondary)
+        if PREDICTION_LOW_MEMORY_MODE and (self._secondary_idle_task is None or self._secondary_idle_task.done()):
+            self._secondary_idle_task = asyncio.create_task(self._unload_idle_secondary())
+
+    async def _unload_idle_secondary(self):
+        """Unload the secondary model once it has gone unused for SECONDARY_IDLE_UNLOAD_SECONDS"""
+        check_interval = max(1.0, min(60.0, SECONDARY_IDLE_UNLOAD_SECONDS / 4))
+        while self.secondary_scheduler is not None:
+            await asyncio.sleep(check_interval)
+
+            idle_for = time.monotonic() - self._secondary_last_used
+            # Frequent fallbacks keep refreshing _secondary_last_used, so only a quiet spell gets here
+            if idle_for < SECONDARY_IDLE_UNLOAD_SECONDS:
+                continue
+
+            self.secondary_scheduler = None
+            self.secondary_session = None
+            gc.collect()
+            print(f"💤 Secondary model unloaded after {idle_for:.0f}s idle")
+
+    @staticmethod
+    def _generate_content_key(image_data: bytes) -> str:
+        """Generate cache key from the downloaded image bytes (fast BLAKE2 digest)"""
+        return hashlib.blake2b(image_data, digest_size=16).hexdigest()
 
     def _generate_cache_key(self, url: str) -> str:
-        """Generate cache key from URL"""
-        return hashlib.md5(url.encode()).hexdigest()
-
-    async def _rate_limit_cdn_request(self):
-        """Apply rate limiting for Discord CDN requests"""
-        async with self._cdn_semaphore:
-            now = time.time()
-            time_since_last = now - self._last_cdn_request
-            if time_since_last < self._cdn_min_interval:
-                await asyncio.sleep(self._cdn_min_interval - time_since_last)
-            self._last_cdn_request = time.time()
-
-    async def preprocess_image(self, url: str, session: aiohttp.ClientSession, 
-                               width=224, height=224, max_retries=4):  # Back to 4 retries
-        """ULTRA MEMORY OPTIMIZED: Async image preprocessing"""
-        is_discord_cdn = 'cdn.discordapp.com' in url or 'media.discordapp.net' in url
+        """Generate cache key from the canonical URL (ignores rotating CDN signatures)"""
+        return hashlib.md5(canonicalize_image_url(url).encode()).hexdigest()
+
+    async def _rate_limit_cdn_request(self, host: str, deadline: Optional[float] = None):
+        """Wait for the host's token bucket (and any 429 cool-down), giving up if it would miss the deadline"""
+        if not await self.cdn_limiter.acquire(host, deadline):
+            raise DeadlineExceeded(f"Rate limit wait for {host} would pass the deadline")
+
+    async def image_to_tensor(self, img: Image.Image, width: int, height: int,
+                              uint8_input: bool = False, resample: int = Image.LANCZOS) -> np.ndarray:
+        """Resize (and normalize, for float-input models) an already decoded image in the worker pool"""
+        loop = asyncio.get_running_loop()
+        convert = self._rgb_image_to_uint8 if uint8_input else self._rgb_image_to_tensor
+        return await loop.run_in_executor(self._executor, convert, img, width, height,
+                                          resample, PREDICTION_RESIZE_REDUCING_GAP)
+
+    async def decode_image(self, image_data: bytes) -> Image.Image:
+        """Decode image bytes to RGB in the worker pool, not on the event loop
+
+        With PREDICTION_DRAFT_DECODE, JPEGs decode at the smallest DCT scale
+        that still covers every model stage's input.
+        """
+        loop = asyncio.get_running_loop()
+        draft_size = self._largest_model_input() if PREDICTION_DRAFT_DECODE else None
+        try:
+            return await loop.run_in_executor(self._executor, self._decode_image, image_data, draft_size)
+        except Exception as e:
+            raise ImageUnavailable(f"Failed to load image: {e}")
+
+    def _largest_model_input(self) -> Tuple[int, int]:
+        """Smallest (width, height) that covers every model stage's input"""
+        width, height = 224, 224
+        if self.secondary_metadata:
+            width = max(width, self.secondary_metadata["image_width"])
+            height = max(height, self.secondary_metadata["image_height"])
+        return width, height
+
+    def _media_proxy_box(self) -> Tuple[int, int]:
+        """Rendition size requested from the media proxy - the largest model input, oversampled"""
+        width, height = self._largest_model_input()
+        return (math.ceil(width * PREDICTION_MEDIA_PROXY_OVERSAMPLE),
+                math.ceil(height * PREDICTION_MEDIA_PROXY_OVERSAMPLE))
+
+    async def fetch_image_bytes(self, url: str, session: aiohttp.ClientSession,
+                                max_retries=4, deadline: Optional[float] = None) -> bytes:
+        """Download raw image bytes, as a downscaled media proxy rendition when the URL allows it
+
+        Attachments are requested already close to the largest size any model
+        stage needs, which cuts bytes transferred and decode/resize cost. Any
+        proxy failure other than a missed deadline falls back to the original
+        URL and its full retry chain.
+        """
+        proxied = media_proxy_url(url, *self._media_proxy_box(), PREDICTION_MEDIA_PROXY_FORMAT) \
+            if PREDICTION_MEDIA_PROXY else None
+        if proxied:
+            try:
+                image_data = await self._fetch_url_bytes(proxied, session, max_retries=1, deadline=deadline)
+                self.media_proxy_counters["fetched"] += 1
+                self.media_proxy_counters["bytes"] += len(image_data)
+                return image_data
+            except ValueError:
+                self.media_proxy_counters["fallbacks"] += 1
+        return await self._fetch_url_bytes(url, session, max_retries=max_retries, deadline=deadline)
+
+    async def _fetch_url_bytes(self, url: str, session: aiohttp.ClientSession,
+                               max_retries=4, deadline: Optional[float] = None) -> bytes:
+        """Download raw image bytes with retries and CDN rate limiting
+
+        With a deadline, every attempt's timeout is clamped to the time left
+        and a retry is only started if its backoff still leaves time for it.
+        """
+        is_discord_cdn = is_discord_cdn_url(url)
+        host = urlsplit(url).hostname if is_discord_cdn else None
         
         for attempt in range(max_retries):
             image_data = None  # Explicitly track for cleanup
+            if time_left(deadline) <= 0:
+                raise DeadlineExceeded("Deadline passed before the image could be fetched")
             try:
                 if is_discord_cdn:
-                    await self._rate_limit_cdn_request()
+                    await self._rate_limit_cdn_request(host, deadline)
                 
                 if is_discord_cdn:
                     timeout_total = 15 + (attempt * 5)  # Restored timeouts
@@ -245,7 +949,9 @@ class Prediction:
                     timeout_total = 10 + (attempt * 3)
                     timeout_connect = 3 + attempt
                 
-                timeout = aiohttp.ClientTimeout(total=timeout_total, connect=timeout_connect)
+                remaining = time_left(deadline)
+                timeout = aiohttp.ClientTimeout(total=min(timeout_total, remaining),
+                                                connect=min(timeout_connect, remaining))
                 
                 headers = {
                     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
@@ -255,66 +961,54 @@ class Prediction:
                     'Pragma': 'no-cache',
                 }
                 
-                async with session.get(url, timeout=timeout, headers=headers) as response:
+                response = await self._open_image_response(url, session, host, timeout, headers)
+                async with response:
                     if response.status == 429:
-                        retry_after = int(response.headers.get('Retry-After', 2))
+                        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                        if is_discord_cdn:
+                            # Every waiter on this host sits out the cool-down, the retry included
+                            self.cdn_limiter.record_throttled(host, retry_after)
+                            retry_after = 0.0
                         if attempt < max_retries - 1:
-                            await asyncio.sleep(retry_after)
+                            await self._retry_sleep(retry_after, deadline)
                             continue
                         raise ValueError(f"Rate limited by Discord CDN")
                     
+                    if is_discord_cdn:
+                        self.cdn_limiter.record_success(host)
+                    
                     if response.status == 404:
-                        if is_discord_cdn and attempt < max_retries - 1:
-                            await asyncio.sleep(1.0 * (2 ** attempt))
+                        # CDN 404s can be propagation delay, but with no time left to retry it is final
+                        backoff = 1.0 * (2 ** attempt)
+                        if is_discord_cdn and attempt < max_retries - 1 and self._retry_fits(backoff, deadline):
+                            await asyncio.sleep(backoff)
                             continue
-                        raise ValueError(f"Image not found (404)")
+                        raise ImageUnavailable(f"Image not found (404)")
                     
                     if response.status in [502, 503, 504]:
                         if attempt < max_retries - 1:
-                            await asyncio.sleep(2.0 * (2 ** attempt))
+                            await self._retry_sleep(2.0 * (2 ** attempt), deadline)
                             continue
                         raise ValueError(f"Server error {response.status}")
                     
                     if response.status != 200:
+                        # Other client errors (403 expired, 410 gone, ...) won't change on a retry
+                        if 400 <= response.status < 500 and response.status != 408:
+                            raise ImageUnavailable(f"HTTP {response.status} error")
                         raise ValueError(f"HTTP {response.status} error")
                     
                     image_data = await response.read()
                 
                 if len(image_data) < 100:
-                    raise ValueError("Invalid/empty image data")
-                
-                # CRITICAL: Process and immediately discard
-                img = Image.open(io.BytesIO(image_data))
-                img = img.convert("RGB")
-                img = img.resize((width, height), Image.LANCZOS)
-                
-                # Convert to numpy IMMEDIATELY
-                image_array = np.array(img, dtype=np.float32)
-                
-                # CRITICAL: Close and delete everything
-                img.close()
-                del img
-                del image_data
-                image_data = None
-                
-                # Normalize in-place to save memory
-                image_array /= 255.0
-                mean = np.array([0.485, 0.456, 0.406], dtype=np.float32)
-                std = np.array([0.229, 0.224, 0.225], dtype=np.float32)
-                image_array -= mean
-                image_array /= std
-
-                # Convert to CHW format
-                image_array = np.transpose(image_array, (2, 0, 1))
-                image_array = np.expand_dims(image_array, axis=0)
-
-                return image_array
+                    raise ImageUnavailable("Invalid/empty image data")
+
+                return image_data
             
             except asyncio.TimeoutError:
                 if image_data:
                     del image_data
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(1.0 * (2 ** attempt))
+                    await self._retry_sleep(1.0 * (2 ** attempt), deadline)
                     continue
                 raise ValueError(f"Timeout fetching image")
             
@@ -322,11 +1016,11 @@ class Prediction:
                 if image_data:
                     del image_data
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(1.0 * (2 ** attempt))
+                    await self._retry_sleep(1.0 * (2 ** attempt), deadline)
                     continue
                 raise ValueError(f"Network error: {e}")
             
-            except ValueError:
+            except (ValueError, DeadlineExceeded):
                 if image_data:
                     del image_data
                 raise
@@ -335,47 +1029,172 @@ class Prediction:
                 if image_data:
                     del image_data
                 if attempt < max_retries - 1:
-                    await asyncio.sleep(0.5 * (2 ** attempt))
+                    await self._retry_sleep(0.5 * (2 ** attempt), deadline)
                     continue
                 raise ValueError(f"Failed to load image: {e}")
         
         raise ValueError(f"Failed to load image after {max_retries} attempts")
 
-    def softmax(self, x):
-        """Vectorized softmax computation"""
-        exp_x = np.exp(x - np.max(x))
-        return exp_x / np.sum(exp_x)
+    async def _open_image_response(self, url: str, session: aiohttp.ClientSession, host: Optional[str],
+                                   timeout: aiohttp.ClientTimeout, headers: dict) -> aiohttp.ClientResponse:
+        """Send the image request, hedging it with a second one if headers are slow to arrive
+
+        Without a hedge policy this is a plain GET. Otherwise, once the host's
+        percentile delay passes with no headers, a second request is sent if
+        the hedge budget (and, on the CDN, a free rate-limit token) allows.
+        The first response wins and the other request is cancelled.
+        """
+        if self.hedge_policy is None:
+            return await session.get(url, timeout=timeout, headers=headers)
+
+        policy = self.hedge_policy
+        latency_key = host or urlsplit(url).hostname or ""
+        policy.record_request()
+        started = time.monotonic()
+        primary = asyncio.ensure_future(session.get(url, timeout=timeout, headers=headers))
+        hedge = None
+        winner = None
+        try:
+            done, _ = await asyncio.wait({primary}, timeout=policy.delay(latency_key))
+            if not done and policy.try_hedge() and (host is None or self.cdn_limiter.try_acquire(host)):
+                hedge = asyncio.ensure_future(session.get(url, timeout=timeout, headers=headers))
+            pending = {primary} if hedge is None else {primary, hedge}
+            error = None
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        error = task.exception()
+                    elif winner is None:
+                        winner = task
+            if winner is None:
+                raise error
+            # A primary beaten by its hedge is recorded at its elapsed time (a lower bound on its latency)
+            policy.record_latency(latency_key, time.monotonic() - started)
+            if winner is hedge:
+                policy.hedge_wins += 1
+            return winner.result()
+        finally:
+            for task in (primary, hedge):
+                if task is None or task is winner:
+                    continue
+                if not task.done():
+                    task.cancel()
+                elif not task.cancelled() and task.exception() is None:
+                    task.result().release()
+
+    def _retry_fits(self, seconds: float, deadline: Optional[float]) -> bool:
+        """Check a retry (its backoff plus time for the request itself) can finish before the deadline"""
+        if seconds + 1.0 >= time_left(deadline):
+            self.deadline_counters["retries_abandoned"] += 1
+            return False
+        return True
+
+    async def _retry_sleep(self, seconds: float, deadline: Optional[float]):
+        """Back off before a retry, or give up now if the retry couldn't finish before the deadline"""
+        if not self._retry_fits(seconds, deadline):
+            raise DeadlineExceeded("Not enough time left to retry the image fetch")
+        await asyncio.sleep(seconds)
+
+    @staticmethod
+    def _decode_image(image_data: bytes, draft_size: Optional[Tuple[int, int]] = None) -> Image.Image:
+        """Decode image bytes into an RGB image (runs in a worker thread)
+
+        draft_size lets the JPEG decoder scale down by 1/2-1/8 while staying at
+        least that large; formats without a draft mode decode in full.
+        """
+        img = Image.open(io.BytesIO(image_data))
+        if draft_size:
+            img.draft("RGB", draft_size)
+        rgb = img.convert("RGB")
+        if rgb is not img:
+            img.close()
+        return rgb
+
+    @staticmethod
+    def _rgb_image_to_uint8(img: Image.Image, width: int, height: int, resample: int = Image.LANCZOS,
+                            reducing_gap: Optional[float] = None) -> np.ndarray:
+        """Resize an RGB image into a contiguous (1, H, W, 3) uint8 array (runs in a worker thread)"""
+        resized = img.resize((width, height), resample, reducing_gap=reducing_gap)
+        try:
+            # The only copy on the hot path - the model graph does layout and normalization
+            return np.asarray(resized, dtype=np.uint8)[np.newaxis]
+        finally:
+            resized.close()
+
+    @staticmethod
+    def _rgb_image_to_tensor(img: Image.Image, width: int, height: int, resample: int = Image.LANCZOS,
+                             reducing_gap: Optional[float] = None) -> np.ndarray:
+        """Resize and normalize an RGB image into a (1, 3, H, W) float tensor (runs in a worker thread)"""
+        return normalize_uint8_nhwc(Prediction._rgb_image_to_uint8(img, width, height, resample, reducing_gap))
+
+    async def predict_with_model(self, image: np.ndarray, scheduler: BatchScheduler,
+                                class_names: list) -> Tuple[int, float, tuple]:
+        """Run prediction with a specific model through its batch scheduler
 
-    async def predict_with_model(self, image: np.ndarray, session: ort.InferenceSession,
-                                class_names: list) -> Tuple[str, float]:
-        """Run prediction with a specific model"""
-        inputs = {session.get_inputs()[0].name: image}
-        outputs = session.run(None, inputs)
-        logits = outputs[0][0]
+        Returns (class index, probability, top-k (name, probability) alternatives).
+        """
+        probabilities = await scheduler.submit(image)
 
-        pred_idx = int(np.argmax(logits))
-        probabilities = self.softmax(logits)
+        k = min(PREDICTION_TOP_K, len(probabilities))
+        top_indices = np.argpartition(probabilities, -k)[-k:]
+        top_indices = top_indices[np.argsort(probabilities[top_indices])[::-1]]
+        top_k = tuple(
+            (self._class_name(class_names, int(idx)), float(probabilities[idx]))
+            for idx in top_indices
+        )
+
+        pred_idx = int(top_indices[0])
         prob = float(probabilities[pred_idx])
+        return pred_idx, prob, top_k
 
-        name = class_names[pred_idx] if pred_idx < len(class_names) else f"unknown_{pred_idx}"
-        
-        # CRITICAL: Aggressively delete everything
-        del outputs
-        del logits
-        del probabilities
-        del inputs
-        
-        return name, prob
+    @staticmethod
+    def _class_name(class_names: list, idx: int) -> str:
+        return class_names[idx] if idx < len(class_names) else f"unknown_{idx}"
 
-    async def predict(self, url: str, session: aiohttp.ClientSession = None) -> Tuple[str, str]:
+    async def predict(self, url: str, session: aiohttp.ClientSession = None,
+                      deadline: Optional[float] = None) -> PredictionResult:
         """
         ULTRA MEMORY OPTIMIZED: Async prediction with dual model fallback
+
+        deadline is an absolute time.monotonic() timestamp. Fetch retries,
+        backoffs and the secondary model are scheduled against the time left;
+        when the secondary model doesn't fit, the primary answer is returned
+        as "primary_deadline". Raises DeadlineExceeded if there is no answer
+        in time.
         """
+        if deadline is None:
+            return await self._predict(url, session, None)
+
+        self.deadline_counters["requests"] += 1
+        try:
+            result = await self._predict(url, session, deadline)
+        except DeadlineExceeded:
+            self.deadline_counters["missed"] += 1
+            raise
+        self.deadline_counters["met" if time.monotonic() <= deadline else "missed"] += 1
+        return result
+
+    async def _predict(self, url: str, session: Optional[aiohttp.ClientSession],
+                       deadline: Optional[float]) -> PredictionResult:
+        """Cache tiers, then one shared fetch + cascade per image"""
         # Check cache first
         cache_key = self._generate_cache_key(url)
         cached_result = self.cache.get(cache_key)
         if cached_result:
-            return cached_result[0], cached_result[1]
+            return cached_result._replace(cached=True)
+
+        # Known dead URL: fail before any disk or network work
+        dead = self.negative_cache.get(url)
+        if dead is not None:
+            message, cost_seconds = dead
+            self.negative_seconds_saved += cost_seconds
+            raise ImageUnavailable(message)
+
+        cached_result = await self._disk_cache_get(cache_key)
+        if cached_result:
+            self.cache.set(cache_key, cached_result)
+            return cached_result._replace(cached=True)
 
         if session is None:
             import __main__
@@ -384,104 +1203,234 @@ class Prediction:
                 raise ValueError("HTTP session not available")
 
         if not self.models_initialized:
-            await self.initialize_models(session)
+            await self._wait_for_models(session, deadline)
 
-        primary_image = None
-        secondary_image = None
-        
+        started = time.monotonic()
+        work = self._inflight.do(
+            cache_key, lambda: self._predict_uncached(url, session, cache_key, deadline)
+        )
         try:
-            # Preprocess image for primary model
-            primary_image = await self.preprocess_image(url, session, width=224, height=224)
-            
-            # Run primary model
-            primary_name, primary_prob = await self.predict_with_model(
+            if deadline is None:
+                try:
+                    result = await work
+                except DeadlineExceeded:
+                    result = None
+                if result is None or result.model_used == "primary_deadline":
+                    # Joined a call bound by another caller's deadline - this caller has none, so finish the job
+                    result = await self._inflight.do(
+                        (cache_key, None), lambda: self._predict_uncached(url, session, cache_key)
+                    )
+                return result
+            # Joining a call started with a later (or no) deadline must not hold this caller past its own
+            try:
+                return await asyncio.wait_for(work, max(0.0, time_left(deadline)))
+            except asyncio.TimeoutError:
+                raise DeadlineExceeded("No prediction before the deadline")
+        except ImageUnavailable as e:
+            # Keyed on the exact URL - a freshly signed link to the same attachment still gets a try
+            self.negative_cache.set(url, (str(e), time.monotonic() - started))
+            raise
+
+    async def _predict_uncached(self, url: str, session: aiohttp.ClientSession,
+                                cache_key: str, deadline: Optional[float] = None) -> PredictionResult:
+        """Fetch, check the content tier, run the cascade and fill every cache tier"""
+        fetch_start = time.perf_counter()
+        image_data = await self.fetch_image_bytes(url, session, deadline=deadline)
+        fetch_ms = (time.perf_counter() - fetch_start) * 1000
+
+        # Same image under a different URL/host: skip decoding and inference entirely
+        content_key = None
+        if self.content_cache is not None:
+            content_key = self._generate_content_key(image_data)
+            cached_result = self.content_cache.get(content_key)
+            if cached_result is None:
+                cached_result = await self._disk_cache_get(content_key)
+                if cached_result:
+                    self.content_cache.set(content_key, cached_result)
+            if cached_result:
+                self.cache.set(cache_key, cached_result)
+                self._disk_cache_set(cache_key, cached_result)
+                return cached_result._replace(cached=True)
+
+            # Different URLs carrying the same bytes also share one inference
+            result = await self._inflight.do(
+                ("content", content_key), lambda: self._run_cascade(image_data, deadline)
+            )
+        else:
+            result = await self._run_cascade(image_data, deadline)
+        result = result._replace(timings={"fetch": round(fetch_ms, 2), **(result.timings or {})})
+
+        # A deadline-truncated answer is returned but not cached - the next request gets the full cascade
+        if result.model_used == "primary_deadline":
+            return result
+
+        self.cache.set(cache_key, result)
+        self._disk_cache_set(cache_key, result)
+        if content_key is not None:
+            self.content_cache.set(content_key, result)
+            self._disk_cache_set(content_key, result)
+        return result
+
+    async def _run_cascade(self, image_data: bytes, deadline: Optional[float] = None) -> PredictionResult:
+        """Decode once and run the primary/secondary model cascade (secondary only if it fits the deadline)"""
+        timings = {}
+
+        # Decode ONCE - both model stages resize from this image
+        stage_start = time.perf_counter()
+        decoded_image = await self.decode_image(image_data)
+        timings["decode"] = round((time.perf_counter() - stage_start) * 1000, 2)
+
+        try:
+            # Preprocess image for primary model and run it
+            stage_start = time.perf_counter()
+            primary_image = await self.image_to_tensor(
+                decoded_image, 224, 224, uint8_input=self.primary_scheduler.uint8_input,
+                resample=self.primary_resample
+            )
+            primary_idx, primary_prob, primary_top_k = await self.predict_with_model(
                 primary_image, 
-                self.primary_session, 
+                self.primary_scheduler, 
                 self.primary_class_names
             )
+            timings["primary"] = round((time.perf_counter() - stage_start) * 1000, 2)
             
-            # CRITICAL: Delete immediately
-            del primary_image
-            primary_image = None
-            
-            primary_confidence_pct = primary_prob * 100
-            
+            primary_result = PredictionResult(
+                class_index=primary_idx,
+                name=primary_top_k[0][0],
+                probability=primary_prob,
+                model_used="primary",
+                top_k=primary_top_k,
+                timings=dict(timings)
+            )
+
+            needs_secondary = primary_prob < 0.85
+
             # If primary confidence >= 85%, use it
-            if primary_confidence_pct >= 85.0:
-                confidence = f"{primary_confidence_pct:.2f}%"
-                result = (primary_name, confidence, "primary")
-                self.cache.set(cache_key, result)
-                
-                # GC every 10 predictions
-                self._prediction_counter += 1
-                if self._prediction_counter >= 10:
-                    gc.collect()
-                    self._prediction_counter = 0
-                
-                return primary_name, confidence
+            if not needs_secondary:
+                return primary_result
             
+            # Not enough time for the secondary model: the primary answer is the best we can do
+            if not self._secondary_fits(deadline):
+                self.deadline_counters["secondary_skipped"] += 1
+                return primary_result._replace(model_used="primary_deadline")
+
             # Try secondary model
-            secondary_width = self.secondary_metadata["image_width"]
-            secondary_height = self.secondary_metadata["image_height"]
-            secondary_image = await self.preprocess_image(
-                url, 
-                session, 
-                width=secondary_width,
-                height=secondary_height
-            )
-            
-            # Run secondary model
-            secondary_name, secondary_prob = await self.predict_with_model(
-                secondary_image,
-                self.secondary_session,
-                self.secondary_class_names
-            )
-            
-            # CRITICAL: Delete immediately
-            del secondary_image
-            secondary_image = None
-            
-            secondary_confidence_pct = secondary_prob * 100
+            stage_start = time.perf_counter()
+            try:
+                secondary_idx, secondary_prob, secondary_top_k = await asyncio.wait_for(
+                    self._run_secondary(decoded_image), time_left(deadline) if deadline else None
+                )
+            except asyncio.TimeoutError:
+                self.deadline_counters["secondary_cut"] += 1
+                return primary_result._replace(model_used="primary_deadline")
+            stage_seconds = time.perf_counter() - stage_start
+            timings["secondary"] = round(stage_seconds * 1000, 2)
+            self._secondary_stage_seconds = 0.8 * self._secondary_stage_seconds + 0.2 * stage_seconds
             
             # If secondary confidence >= 90%, use it
-            if secondary_confidence_pct >= 90.0:
-                confidence = f"{secondary_confidence_pct:.2f}%"
-                result = (secondary_name, confidence, "secondary")
-                self.cache.set(cache_key, result)
-                
-                self._prediction_counter += 1
-                if self._prediction_counter >= 10:
-                    gc.collect()
-                    self._prediction_counter = 0
-                
-                return secondary_name, confidence
+            if secondary_prob >= 0.90:
+                return PredictionResult(
+                    class_index=secondary_idx,
+                    name=secondary_top_k[0][0],
+                    probability=secondary_prob,
+                    model_used="secondary",
+                    top_k=secondary_top_k,
+                    timings=timings
+                )
             
-            # Fallback to primary
-            confidence = f"{primary_confidence_pct:.2f}%"
-            result = (primary_name, confidence, "primary_fallback")
-            self.cache.set(cache_key, result)
-            
-            self._prediction_counter += 1
-            if self._prediction_counter >= 10:
-                gc.collect()
-                self._prediction_counter = 0
-            
-            return primary_name, confidence
-            
-        except Exception as e:
-            # Ensure cleanup on error
-            if primary_image is not None:
-                del primary_image
-            if secondary_image is not None:
-                del secondary_image
-            gc.collect()
-            raise
+            # Fallback to primary (the secondary still ran, so its time is reported)
+            return primary_result._replace(model_used="primary_fallback", timings=timings)
         finally:
-            # Extra safety cleanup
-            if primary_image is not None:
-                del primary_image
-            if secondary_image is not None:
-                del secondary_image
+            decoded_image.close()
+
+    async def _run_secondary(self, decoded_image: Image.Image) -> Tuple[int, float, tuple]:
+        """Resize for and run the secondary model (loading it first in low-memory mode)"""
+        secondary_scheduler = await self._get_secondary_scheduler()
+        secondary_image = await self.image_to_tensor(
+            decoded_image,
+            self.secondary_metadata["image_width"],
+            self.secondary_metadata["image_height"],
+            uint8_input=secondary_scheduler.uint8_input,
+            resample=self.secondary_resample
+        )
+        return await self.predict_with_model(
+            secondary_image,
+            secondary_scheduler,
+            self.secondary_class_names
+        )
+
+    def _secondary_fits(self, deadline: Optional[float]) -> bool:
+        """Whether the secondary stage (and loading it, if unloaded) is expected to finish in time"""
+        if deadline is None:
+            return True
+        estimate = self._secondary_stage_seconds
+        if not self.secondary_loaded:
+            estimate += self._secondary_load_seconds
+        return time_left(deadline) > estimate
+
+    def deadline_stats(self) -> dict:
+        """Snapshot of the deadline counters"""
+        return dict(self.deadline_counters)
+
+    async def _disk_cache_get(self, key: str) -> Optional[PredictionResult]:
+        """Look a result up in the persistent tier"""
+        if self.disk_cache is None:
+            return None
+        value = await self.disk_cache.get(key)
+        if not isinstance(value, dict):
+            return None
+        try:
+            return PredictionResult.from_dict(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _disk_cache_set(self, key: str, result: PredictionResult):
+        """Queue a result for the persistent tier"""
+        if self.disk_cache is not None:
+            self.disk_cache.set(key, result.to_dict())
+
+    def label_for(self, result: PredictionResult) -> LabelInfo:
+        """Get the precompiled label metadata for a prediction
+
+        Cached results can be served before the models (and their label
+        tables) have loaded; those get the same Pokedex lookup, built on the fly.
+        """
+        labels = self.secondary_labels if result.model_used == "secondary" else self.primary_labels
+        if 0 <= result.class_index < len(labels) and labels[result.class_index].label == result.name:
+            return labels[result.class_index]
+        return build_label_info(result.name, self._name_index, self._cdn_mapping)
+
+    def close(self):
+        """Flush the persistent cache and stop the worker pool"""
+        if self.disk_cache is not None:
+            self.disk_cache.close()
+        self._executor.shutdown(wait=False)
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counters for every prediction cache tier"""
+        stats = {"url": self.cache.stats()}
+        if self.content_cache is not None:
+            stats["content"] = self.content_cache.stats()
+        if self.disk_cache is not None:
+            stats["disk"] = self.disk_cache.stats()
+        stats["negative"] = {**self.negative_cache.stats(),
+                             "seconds_saved": round(self.negative_seconds_saved, 2)}
+        stats["in_flight"] = self._inflight.stats()
+        return stats
+
+    def media_proxy_stats(self) -> dict:
+        """Media proxy renditions fetched, fallbacks to the original URL and average rendition size"""
+        fetched = self.media_proxy_counters["fetched"]
+        return {**self.media_proxy_counters,
+                "avg_kb": round(self.media_proxy_counters["bytes"] / fetched / 1024, 1) if fetched else 0.0}
+
+    def hedge_stats(self) -> Optional[dict]:
+        """Hedged-fetch counters, or None when hedging is off"""
+        return None if self.hedge_policy is None else self.hedge_policy.stats()
+
+    def rate_limit_stats(self) -> dict:
+        """Per-CDN-host limiter rate, queue depth and wait times"""
+        return self.cdn_limiter.stats()
 
 
 def main():
@@ -499,8 +1448,10 @@ def main():
                     break
 
                 try:
-                    name, confidence = await predictor.predict(url, session)
-                    print(f"Predicted Pokémon: {name} (confidence: {confidence})")
+                    result = await predictor.predict(url, session)
+                    print(f"Predicted Pokémon: {result.name} (confidence: {result.confidence_pct:.2f}%, "
+                          f"model: {result.model_used}, timings: {result.timings})")
+                    print(f"Top-{len(result.top_k)}: {result.top_k}")
                 except Exception as e:
                     print(f"Error: {e}")
 
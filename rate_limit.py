@@ -0,0 +1,169 @@
+"""Adaptive per-host rate limiting (token buckets that learn from 429s and Retry-After)"""
+import asyncio
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+
+
+def parse_retry_after(value: Optional[str], default: float = 2.0) -> float:
+    """Seconds to wait from a Retry-After header (delta-seconds or HTTP-date)"""
+    if not value:
+        return default
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return default
+
+
+class TokenBucket:
+    """Token bucket with an adaptive rate and a shared cool-down
+
+    Tokens refill at `rate` per second up to `burst`. Waiters queue in
+    arrival order behind one lock, so only the head of the queue sleeps for
+    the next token. The rate grows additively on every accepted request and
+    halves on a 429 (AIMD), staying within [min_rate, max_rate]. A 429 also
+    starts a cool-down that every waiter respects, so one throttled request
+    pauses the whole host instead of each request backing off on its own.
+    """
+    def __init__(self, rate: float, burst: int, min_rate: float, max_rate: float,
+                 increase: float, decrease: float = 0.5):
+        self.rate = rate
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self.cooldown_until = 0.0
+        self._lock = asyncio.Lock()
+
+        self.waiting = 0
+        self.max_waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.throttled = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _refill(self, now: float):
+        if now > self._updated:
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+
+    def _delay(self, now: float) -> float:
+        """Seconds until a token can be taken (0 when one is available now)"""
+        if now < self.cooldown_until:
+            return self.cooldown_until - now
+        self._refill(now)
+        if self._tokens >= 1:
+            return 0.0
+        return (1 - self._tokens) / self.rate
+
+    async def acquire(self, deadline: Optional[float] = None) -> bool:
+        """Wait for a token, or return False if none can be had before the deadline (monotonic)"""
+        started = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        try:
+            if deadline is None:
+                await self._lock.acquire()
+            else:
+                try:
+                    await asyncio.wait_for(self._lock.acquire(), max(0.0, deadline - started))
+                except asyncio.TimeoutError:
+                    self.rejected += 1
+                    return False
+            try:
+                while True:
+                    now = time.monotonic()
+                    delay = self._delay(now)
+                    if delay <= 0:
+                        self._tokens -= 1
+                        break
+                    if deadline is not None and now + delay >= deadline:
+                        # Fail fast rather than sleep into a miss
+                        self.rejected += 1
+                        return False
+                    await asyncio.sleep(delay)
+            finally:
+                self._lock.release()
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - started
+        self.acquired += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        return True
+
+    def try_acquire(self) -> bool:
+        """Take a token only if one is free right now (never queues)"""
+        if self._lock.locked() or self._delay(time.monotonic()) > 0:
+            return False
+        self._tokens -= 1
+        self.acquired += 1
+        return True
+
+    def record_success(self):
+        """The host accepted a request - probe for more throughput"""
+        self.rate = min(self.max_rate, self.rate + self.increase)
+
+    def record_throttled(self, retry_after: float):
+        """The host answered 429 - back off the rate and pause every waiter for retry_after"""
+        self.throttled += 1
+        now = time.monotonic()
+        if now >= self.cooldown_until:
+            # A burst of 429s from the same window only halves the rate once
+            self.rate = max(self.min_rate, self.rate * self.decrease)
+        self.cooldown_until = max(self.cooldown_until, now + retry_after)
+        # Start empty and only refill once the cool-down is over, so waiters trickle back in
+        self._tokens = 0.0
+        self._updated = self.cooldown_until
+
+    def stats(self) -> dict:
+        return {
+            "rate": round(self.rate, 2),
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "throttled": self.throttled,
+            "avg_wait_ms": round(self.total_wait / self.acquired * 1000, 1) if self.acquired else 0.0,
+            "max_wait_ms": round(self.max_wait * 1000, 1),
+            "cooldown_left": round(max(0.0, self.cooldown_until - time.monotonic()), 2),
+        }
+
+
+class HostRateLimiter:
+    """One adaptive TokenBucket per host, created on first use"""
+    def __init__(self, rate: float, burst: int, min_rate: float, max_rate: float, increase: float):
+        self._settings = dict(rate=rate, burst=burst, min_rate=min_rate,
+                              max_rate=max_rate, increase=increase)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def bucket(self, host: str) -> TokenBucket:
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = TokenBucket(**self._settings)
+        return bucket
+
+    async def acquire(self, host: str, deadline: Optional[float] = None) -> bool:
+        return await self.bucket(host).acquire(deadline)
+
+    def try_acquire(self, host: str) -> bool:
+        return self.bucket(host).try_acquire()
+
+    def record_success(self, host: str):
+        self.bucket(host).record_success()
+
+    def record_throttled(self, host: str, retry_after: float):
+        self.bucket(host).record_throttled(retry_after)
+
+    def stats(self) -> dict:
+        """Per-host rate, queue depth and wait-time counters"""
+        return {host: bucket.stats() for host, bucket in sorted(self._buckets.items())}
@@ -2,9 +2,23 @@
 import json
 import unicodedata
 import discord
-from typing import List, Optional, Dict
+from typing import List, NamedTuple, Optional, Dict, Tuple
 from config import POKEMON_DATA_PATH
 
+RARE_RARITIES = ('legendary', 'mythical', 'ultra beast')
+
+class LabelInfo(NamedTuple):
+    """Precompiled Pokedex metadata for one model output class"""
+    label: str                      # Raw class name, e.g. "Pikachu-Female"
+    base_name: str                  # Name without gender suffix
+    gender: Optional[str]           # 'male', 'female' or None
+    dex_number: Optional[int]
+    rarities: Tuple[str, ...]       # Lowercased rarity tags
+    is_rare: bool                   # Legendary, Mythical or Ultra Beast
+    is_regional: bool
+    cdn_number: Optional[str]
+    pokemon: Optional[Dict]         # Matching pokemondata.json entry
+
 def load_pokemon_data() -> List[Dict]:
     """Load Pokemon data from pokemondata.json"""
     try:
@@ -121,6 +135,80 @@ def is_rare_pokemon(pokemon: Dict) -> bool:
     else:
         return rarity.lower() in ['legendary', 'mythical', 'ultra beast']
 
+def split_gender_suffix(name: str) -> Tuple[str, Optional[str]]:
+    """Split a model label into (base name, gender) - "Pikachu-Female" -> ("Pikachu", "female")"""
+    if name.endswith("-Male"):
+        return name[:-5], 'male'
+    if name.endswith("-Female"):
+        return name[:-7], 'female'
+    return name, None
+
+def build_pokemon_name_index(pokemon_data: List[Dict]) -> Dict[str, Dict]:
+    """
+    Build a lowercase name -> Pokemon lookup table
+
+    Matches the same entry find_pokemon_by_name would (first Pokemon whose
+    main or other-language name matches), but in O(1) per lookup.
+    """
+    index = {}
+    for pokemon in pokemon_data:
+        names = [pokemon.get('name', '')]
+        other_names = pokemon.get('other_names')
+        if other_names and isinstance(other_names, dict):
+            for lang_name_data in other_names.values():
+                if isinstance(lang_name_data, str):
+                    names.append(lang_name_data)
+                elif isinstance(lang_name_data, list):
+                    names.extend(n for n in lang_name_data if n and isinstance(n, str))
+
+        for name in names:
+            key = name.lower().strip()
+            if key and key not in index:
+                index[key] = pokemon
+    return index
+
+def build_label_info(label: str, name_index: Dict[str, Dict], cdn_mapping: Dict[str, str]) -> LabelInfo:
+    """Join one model label to the Pokedex and CDN mapping"""
+    base_name, gender = split_gender_suffix(label)
+    base_key = base_name.lower().strip()
+    pokemon = name_index.get(base_key) or name_index.get(label.lower().strip())
+
+    rarities = ()
+    dex_number = None
+    if pokemon:
+        rarity_value = pokemon.get('rarity') or []
+        rarity_list = rarity_value if isinstance(rarity_value, list) else [rarity_value]
+        rarities = tuple(r.lower() for r in rarity_list if r)
+        dex_number = pokemon.get('dex_number')
+
+    return LabelInfo(
+        label=label,
+        base_name=base_name,
+        gender=gender,
+        dex_number=dex_number,
+        rarities=rarities,
+        is_rare=any(r in RARE_RARITIES for r in rarities),
+        is_regional='regional' in rarities,
+        cdn_number=cdn_mapping.get(base_key),
+        pokemon=pokemon
+    )
+
+def build_label_metadata(class_names: List[str], pokemon_data: List[Dict],
+                         cdn_mapping: Dict[str, str]) -> List[LabelInfo]:
+    """Build the per-class metadata table for a model's label set"""
+    name_index = build_pokemon_name_index(pokemon_data)
+    return [build_label_info(name, name_index, cdn_mapping) for name in class_names]
+
+def format_label_prediction(label: LabelInfo, confidence: str) -> str:
+    """Format a prediction from precompiled label metadata (no string parsing)"""
+    if label.gender:
+        return f"{label.base_name}: {confidence}\nGender: {label.gender.capitalize()}"
+    return f"{label.base_name}: {confidence}"
+
+def format_confidence(probability: float) -> str:
+    """Format a 0-1 prediction probability as a percentage string"""
+    return f"{probability * 100:.2f}%"
+
 def format_pokemon_prediction(name: str, confidence: str) -> str:
     """Format the Pokemon prediction output"""
     if name.endswith("-Male") or name.endswith("-Female"):